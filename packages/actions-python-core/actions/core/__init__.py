@@ -1,21 +1,33 @@
+import importlib
+import typing
+
 from actions.core.core import (
     add_path,
+    add_paths,
+    annotate_many,
     debug,
     end_group,
     error,
     export_variable,
+    export_variables,
     get_boolean_input,
     get_input,
+    get_inputs,
     get_multiline_input,
     get_state,
     group,
+    has_path,
     info,
     is_debug,
+    iter_multiline_input,
     notice,
+    refresh_inputs,
     save_state,
+    save_states,
     set_command_echo,
     set_failed,
     set_output,
+    set_outputs,
     set_secret,
     start_group,
     warning,
@@ -24,26 +36,56 @@ from actions.core.oidc_utils import OidcClient, get_id_token
 from actions.core.path_utils import to_platform_path, to_posix_path, to_win32_path
 from actions.core.summary import summary
 
+if typing.TYPE_CHECKING:
+    from actions.core.action_inputs import load_inputs
+    from actions.core.junit import report_junit
+
+# Imported on first use, they load optional dependencies (PyYAML) or modules
+# most actions do not need (process pools and XML parsing).
+_LAZY_MODULES = {
+    "load_inputs": "actions.core.action_inputs",
+    "report_junit": "actions.core.junit",
+}
+
+
+def __getattr__(name: str) -> typing.Any:
+    module = _LAZY_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
+
+
 __all__ = [
     "add_path",
+    "add_paths",
+    "annotate_many",
     "debug",
     "end_group",
     "error",
     "export_variable",
+    "export_variables",
     "get_boolean_input",
     "get_id_token",
     "get_input",
+    "get_inputs",
     "get_multiline_input",
     "get_state",
     "group",
+    "has_path",
     "info",
     "is_debug",
+    "iter_multiline_input",
+    "load_inputs",
     "notice",
     "OidcClient",
+    "refresh_inputs",
+    "report_junit",
     "save_state",
+    "save_states",
     "set_command_echo",
     "set_failed",
     "set_output",
+    "set_outputs",
     "set_secret",
     "start_group",
     "summary",
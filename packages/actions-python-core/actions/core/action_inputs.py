@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import pathlib
+import typing
+
+from actions.core.core import (
+    error,
+    get_boolean_input,
+    get_input,
+    get_multiline_input,
+)
+
+ACTION_METADATA_FILES = ("action.yml", "action.yaml")
+
+# Input types, a sequence of strings is an enum of the allowed values.
+InputType = typing.Union[
+    typing.Literal["string", "int", "float", "boolean", "json", "path", "list"],
+    typing.Sequence[str],
+]
+
+_InputParser = typing.Callable[[str, bool], typing.Any]
+
+_metadata_cache: typing.Dict[str, typing.Tuple[int, typing.Dict[str, typing.Any]]] = {}
+
+
+def find_action_metadata(action_path: typing.Optional[str] = None) -> str:
+    """
+    Finds the metadata file (action.yml or action.yaml) of the action
+    :param action_path: directory of the action, defaults to GITHUB_ACTION_PATH
+                        or the current directory
+    :return: path of the metadata file
+    """
+    directory = action_path or os.getenv("GITHUB_ACTION_PATH") or os.getcwd()
+    for name in ACTION_METADATA_FILES:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+
+    raise Exception(f"Unable to find action metadata (action.yml) in {directory}")
+
+
+def read_action_metadata(
+    action_path: typing.Optional[str] = None,
+) -> typing.Dict[str, typing.Any]:
+    """
+    Reads the metadata file of the action.
+    The parsed metadata is cached in memory and as JSON in RUNNER_TEMP, keyed by
+    the file's modification time, so the YAML is only parsed again when the file
+    changes.
+    :param action_path: directory of the action, see `find_action_metadata`
+    :return: parsed metadata
+    """
+    path = os.path.abspath(find_action_metadata(action_path))
+    mtime = os.stat(path).st_mtime_ns
+
+    cached = _metadata_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    cache_file = _metadata_cache_file(path)
+    metadata = _read_metadata_cache_file(cache_file, mtime)
+    if metadata is None:
+        # Imported here, most runs read the metadata cache file instead.
+        try:
+            import yaml
+        except ImportError:  # pragma: no cover
+            raise Exception(
+                "PyYAML is required to read action metadata, install "
+                "actions-python-core[yaml]"
+            ) from None
+        with open(path, "rb") as f:
+            metadata = yaml.safe_load(f) or {}
+        if cache_file:
+            _write_metadata_cache_file(cache_file, mtime, metadata)
+
+    _metadata_cache[path] = (mtime, metadata)
+    return metadata
+
+
+def load_inputs(
+    types: typing.Optional[typing.Mapping[str, InputType]] = None,
+    action_path: typing.Optional[str] = None,
+) -> typing.Dict[str, typing.Any]:
+    """
+    Reads and converts every input declared in the action metadata.
+
+    Inputs are validated in one pass. Every invalid or missing required input is
+    reported with `error` and then a single exception is raised.
+    Inputs without a type in `types` are booleans when their default is a YAML
+    boolean, strings otherwise. Optional inputs that are empty are `None`,
+    except for strings (empty string) and lists (empty list).
+    :param types: type of each input, by input name
+    :param action_path: directory of the action, see `find_action_metadata`
+    :return: converted values, by input name
+    """
+    types = types or {}
+    inputs = read_action_metadata(action_path).get("inputs") or {}
+
+    unknown = set(types) - set(inputs)
+    if unknown:
+        raise Exception(f"Unknown inputs: {', '.join(sorted(unknown))}")
+
+    values: typing.Dict[str, typing.Any] = {}
+    errors: typing.List[str] = []
+    for name, spec in inputs.items():
+        spec = spec or {}
+        input_type = types.get(name) or _default_type(spec)
+        required = bool(spec.get("required")) and spec.get("default") is None
+        try:
+            values[name] = _compile_parser(input_type)(name, required)
+        except Exception as e:
+            errors.append(f"Invalid input '{name}': {e}")
+
+    for message in errors:
+        error(message)
+    if errors:
+        raise Exception(f"{len(errors)} invalid input(s)")
+
+    return values
+
+
+def _default_type(spec: typing.Mapping[str, typing.Any]) -> InputType:
+    default = spec.get("default")
+    if isinstance(default, bool) or str(default) in {"true", "false"}:
+        return "boolean"
+    return "string"
+
+
+def _compile_parser(input_type: InputType) -> _InputParser:
+    if isinstance(input_type, str):
+        if input_type not in _PARSERS:
+            raise Exception(f"Unsupported input type: {input_type}")
+        return _PARSERS[input_type]
+
+    choices = frozenset(input_type)
+    allowed = ", ".join(input_type)
+
+    def parse_enum(name: str, required: bool) -> typing.Optional[str]:
+        value = get_input(name, required=required)
+        if not value:
+            return None
+        if value not in choices:
+            raise ValueError(f"'{value}' is not one of {allowed}")
+        return value
+
+    return parse_enum
+
+
+def _scalar_parser(
+    convert: typing.Callable[[str], typing.Any],
+) -> _InputParser:
+    def parse(name: str, required: bool) -> typing.Any:
+        value = get_input(name, required=required)
+        return convert(value) if value else None
+
+    return parse
+
+
+def _parse_boolean(name: str, required: bool) -> typing.Optional[bool]:
+    if not get_input(name, required=required):
+        return None
+    return get_boolean_input(name)
+
+
+_PARSERS: typing.Dict[str, _InputParser] = {
+    "string": lambda name, required: get_input(name, required=required),
+    "int": _scalar_parser(int),
+    "float": _scalar_parser(float),
+    "boolean": _parse_boolean,
+    "json": _scalar_parser(json.loads),
+    "path": _scalar_parser(pathlib.Path),
+    "list": lambda name, required: get_multiline_input(name, required=required),
+}
+
+
+def _metadata_cache_file(path: str) -> typing.Optional[str]:
+    runner_temp = os.getenv("RUNNER_TEMP")
+    if not runner_temp:
+        return None
+    digest = hashlib.sha256(path.encode()).hexdigest()[:16]
+    return os.path.join(runner_temp, "actions-python-core", f"action-{digest}.json")
+
+
+def _read_metadata_cache_file(
+    cache_file: typing.Optional[str], mtime: int
+) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    if not cache_file:
+        return None
+    try:
+        with open(cache_file, "rb") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached["metadata"] if cached.get("mtime") == mtime else None
+
+
+def _write_metadata_cache_file(
+    cache_file: str, mtime: int, metadata: typing.Dict[str, typing.Any]
+) -> None:
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump({"mtime": mtime, "metadata": metadata}, f, default=str)
+    except OSError:
+        # The cache is an optimization only.
+        pass
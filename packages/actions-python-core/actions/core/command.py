@@ -1,11 +1,16 @@
 import os
-import sys
 import typing
 
+from actions.core.redaction import redactor
 from actions.core.utils import to_command_value
+from actions.core.writer import get_writer
 
 CommandProperties = typing.Dict[str, typing.Any]
 
+# Commands whose values are read by the runner rather than shown in the log,
+# they keep the real values of secrets.
+UNREDACTED_COMMANDS = frozenset({"add-mask", "set-output", "set-env", "save-state"})
+
 
 def issue_command(
     command: str, properties: CommandProperties, message: typing.Any
@@ -20,8 +25,24 @@ def issue_command(
         ::warning::This is the message
         ::set-env name=MY_VAR::some value
     """
-    cmd = Command(command, properties, message)
-    sys.stdout.write(str(cmd) + os.linesep)
+    get_writer().write(format_command(command, properties, message))
+
+
+def format_command(
+    command: str, properties: CommandProperties, message: typing.Any
+) -> str:
+    """
+    Formats a command as a complete line, including the line separator.
+    Secrets registered with `set_secret` are masked in the message and property
+    values, except in UNREDACTED_COMMANDS.
+    """
+    if redactor and command not in UNREDACTED_COMMANDS:
+        message = redactor.redact(to_command_value(message))
+        properties = {
+            k: None if v is None else redactor.redact(to_command_value(v))
+            for k, v in properties.items()
+        }
+    return str(Command(command, properties, message)) + os.linesep
 
 
 def issue(name: str, message: str = "") -> None:
@@ -60,21 +81,66 @@ class Command:
         return cmd_str
 
 
+class Escaper:
+    """
+    Escapes a fixed set of characters, e.g. percent-escapes command values.
+
+    Every character is first looked up with a C-level substring search, which
+    does not copy anything, so values without escapable characters are returned
+    as-is and only the characters actually present are replaced.
+    """
+
+    # Joins values for bulk escaping; never escaped and rare in log messages.
+    SEPARATOR = "\x00"
+
+    table: typing.Tuple[typing.Tuple[str, str], ...]
+
+    def __init__(self, table: typing.Sequence[typing.Tuple[str, str]]) -> None:
+        """
+        :param table: pairs of character and replacement, applied in order
+        """
+        self.table = tuple(table)
+
+    def __call__(self, s: typing.Any) -> str:
+        value = to_command_value(s)
+        for char, replacement in self.table:
+            if char in value:
+                value = value.replace(char, replacement)
+        return value
+
+    def many(self, values: typing.Iterable[typing.Any]) -> typing.List[str]:
+        """
+        Escapes many values at once. Values are joined and escaped as a single
+        string, so the per-value cost is one list item instead of one call.
+        :param values: values to escape
+        :return: escaped values in the same order
+        """
+        converted = [to_command_value(v) for v in values]
+        if not converted:
+            return []
+
+        joined = self.SEPARATOR.join(converted)
+        if joined.count(self.SEPARATOR) != len(converted) - 1:
+            return [self(v) for v in converted]
+        return self(joined).split(self.SEPARATOR)
+
+
+# "%" comes first so the escape sequences themselves are not escaped again.
+_escape_data = Escaper((("%", "%25"), ("\r", "%0D"), ("\n", "%0A")))
+_escape_property = Escaper((*_escape_data.table, (":", "%3A"), (",", "%2C")))
+
+
 def escape_data(s: typing.Any) -> str:
-    return (
-        to_command_value(s)
-        .replace("%", "%25")
-        .replace("\r", "%0D")
-        .replace("\n", "%0A")
-    )
+    return _escape_data(s)
 
 
 def escape_property(s: typing.Any) -> str:
-    return (
-        to_command_value(s)
-        .replace("%", "%25")
-        .replace("\r", "%0D")
-        .replace("\n", "%0A")
-        .replace(":", "%3A")
-        .replace(",", "%2C")
-    )
+    return _escape_property(s)
+
+
+def escape_data_many(values: typing.Iterable[typing.Any]) -> typing.List[str]:
+    return _escape_data.many(values)
+
+
+def escape_property_many(values: typing.Iterable[typing.Any]) -> typing.List[str]:
+    return _escape_property.many(values)
@@ -1,13 +1,23 @@
 import asyncio
+import atexit
 import enum
+import functools
 import os
-import sys
+import re
+import types
 import typing
 
 from actions.core._compat import Unpack
-from actions.core.command import issue, issue_command
-from actions.core.file_command import issue_file_command, prepare_key_value_message
-from actions.core.utils import to_command_properties, to_command_value
+from actions.core.command import format_command, issue, issue_command
+from actions.core.file_command import (
+    issue_file_command,
+    issue_key_value_file_command,
+    issue_key_value_file_commands,
+    materialize_value,
+)
+from actions.core.redaction import redactor
+from actions.core.utils import to_command_properties
+from actions.core.writer import get_writer
 
 T = typing.TypeVar("T")
 
@@ -67,29 +77,71 @@ class AnnotationProperties(typing.TypedDict, total=False):
     end_column: int
 
 
+KeyValues = typing.Union[
+    typing.Mapping[str, typing.Any], typing.Iterable[typing.Tuple[str, typing.Any]]
+]
+
+AnnotationLevel = typing.Literal["error", "warning", "notice"]
+
+AnnotationRecord = typing.Tuple[
+    AnnotationLevel,
+    typing.Union[str, Exception],
+    typing.Optional[AnnotationProperties],
+]
+
+# The runner only displays this many annotations of each type per step.
+ANNOTATION_LIMITS: typing.Dict[AnnotationLevel, typing.Optional[int]] = {
+    "error": 10,
+    "warning": 10,
+    "notice": 10,
+}
+
+# Annotations added with annotate_many in this step, per type
+_annotation_counts: typing.Dict[str, int] = {}
+# Annotations dropped by annotate_many in this step, per type, counted in a
+# notice when the step ends
+_suppressed_annotations: typing.Dict[str, int] = {}
+
+
 def export_variable(name: str, val) -> None:
     """
     Sets env variable for this action and future actions in the job
     :param name: the name of the variable to set
     :param val: the value of the variable. Non-string values will be converted
-                to a string via json.dumps
+                to a string via json.dumps. Bytes, file objects and iterators of
+                bytes or str are read as text.
     """
-    converted_value = to_command_value(val)
+    converted_value = materialize_value(val)
     os.environ[name] = converted_value
 
     file_path = os.getenv("GITHUB_ENV")
     if file_path:
-        return issue_file_command("ENV", prepare_key_value_message(name, val))
+        return issue_key_value_file_command("ENV", name, converted_value)
 
     issue_command("set-env", {"name": name}, converted_value)
 
 
+def export_variables(variables: KeyValues) -> None:
+    """
+    Sets many env variables for this action and future actions in the job, with
+    a single write. If a name appears more than once, the last value wins.
+    :param variables: mapping or (name, value) pairs. Non-string values will be
+                      converted to a string via json.dumps
+    """
+    converted = {name: materialize_value(val) for name, val in dict(variables).items()}
+    os.environ.update(converted)
+    _issue_key_value_commands("ENV", "set-env", converted)
+
+
 def set_secret(secret: str) -> None:
     """
     Registers a secret which will get masked from logs
+    The secret is also masked in everything the toolkit writes itself, such as
+    info messages, outputs and the step summary.
     :param secret: value of the secret
     """
     issue_command("add-mask", {}, secret)
+    redactor.add(secret)
 
 
 def add_path(input_path: str) -> None:
@@ -105,6 +157,129 @@ def add_path(input_path: str) -> None:
     os.environ["PATH"] = f'{input_path}{os.pathsep}{os.getenv("PATH")}'
 
 
+def add_paths(input_paths: typing.Iterable[str]) -> typing.List[str]:
+    """
+    Prepends several paths to the PATH (for this action and future actions),
+    in the given order, so the first path is searched first.
+    Paths already in the PATH, and repeated paths, are skipped. The PATH is
+    updated once and all records are appended to GITHUB_PATH in one write.
+    :param input_paths: paths to prepend
+    :return: the paths that were added
+    """
+    global _path_index_cache
+
+    current = os.getenv("PATH", "")
+    index = _path_index(current)
+    added = [
+        input_path
+        for input_path in dict.fromkeys(input_paths)
+        if input_path and input_path not in index
+    ]
+    if not added:
+        return added
+
+    # The runner prepends GITHUB_PATH records one after another, so the last
+    # record ends up first.
+    if os.getenv("GITHUB_PATH"):
+        issue_file_command("PATH", os.linesep.join(reversed(added)))
+    else:
+        get_writer().write(
+            "".join(format_command("add-path", {}, path) for path in reversed(added))
+        )
+
+    path = os.pathsep.join([*added, current] if current else added)
+    os.environ["PATH"] = path
+    _path_index_cache = (path, index.union(added))
+    return added
+
+
+def has_path(input_path: str) -> bool:
+    """
+    Checks whether a path is an entry of the PATH. The entries are indexed
+    once and the index is rebuilt only when the PATH changes.
+    :param input_path: path to look up
+    """
+    return input_path in _path_index(os.getenv("PATH", ""))
+
+
+# PATH value and the set of its entries
+_path_index_cache: typing.Optional[typing.Tuple[str, typing.FrozenSet[str]]] = None
+
+
+def _path_index(path: str) -> typing.FrozenSet[str]:
+    global _path_index_cache
+
+    if _path_index_cache is None or _path_index_cache[0] != path:
+        entries = frozenset(filter(None, path.split(os.pathsep)))
+        _path_index_cache = (path, entries)
+    return _path_index_cache[1]
+
+
+class _EnvironSnapshot:
+    """
+    Immutable index of the INPUT_* and STATE_* environment variables, keyed by
+    the rest of the variable name. On Windows environment variable names are
+    case-insensitive and `os.environ` upper-cases them, so states are keyed by
+    upper-cased name there, see `_state_key`.
+    """
+
+    inputs: typing.Mapping[str, str]
+    states: typing.Mapping[str, str]
+
+    def __init__(self, environ: typing.Mapping[str, str]) -> None:
+        inputs: typing.Dict[str, str] = {}
+        states: typing.Dict[str, str] = {}
+        for key, value in environ.items():
+            if key.startswith("INPUT_"):
+                inputs[key[6:]] = value
+            elif key.startswith("STATE_"):
+                states[_state_key(key[6:])] = value
+        self.inputs = types.MappingProxyType(inputs)
+        self.states = types.MappingProxyType(states)
+
+
+_environ_snapshot: typing.Optional[_EnvironSnapshot] = None
+
+
+def _snapshot() -> _EnvironSnapshot:
+    global _environ_snapshot
+
+    if _environ_snapshot is None:
+        _environ_snapshot = _EnvironSnapshot(os.environ)
+    return _environ_snapshot
+
+
+def _state_key(name: str) -> str:
+    return name.upper() if os.name == "nt" else name
+
+
+@functools.lru_cache(maxsize=None)
+def _input_key(name: str) -> str:
+    return name.replace(" ", "_").upper()
+
+
+def refresh_inputs() -> None:
+    """
+    Inputs and states are read from the environment once, on first use. Call
+    this after changing INPUT_* or STATE_* variables in this process.
+    """
+    global _environ_snapshot
+
+    _environ_snapshot = None
+
+
+def get_inputs(trim_whitespace: bool = True) -> typing.Dict[str, str]:
+    """
+    Gets the values of all inputs, keyed by lower-cased input name (spaces in
+    the original name appear as underscores).
+    :param trim_whitespace: whether leading/trailing whitespace is trimmed
+    """
+    inputs = _snapshot().inputs
+    if not trim_whitespace:
+        return {key.lower(): value for key, value in inputs.items()}
+    return {key.lower(): value.strip() for key, value in inputs.items()}
+
+
 def get_input(name: str, **options: Unpack[InputOptions]) -> str:
     """
     Gets the value of an input.
@@ -113,7 +288,7 @@ def get_input(name: str, **options: Unpack[InputOptions]) -> str:
     :param name: name of the input to get
     :param options: See InputOptions.
     """
-    value = os.getenv(f"INPUT_{name.replace(' ', '_').upper()}", "")
+    value = _snapshot().inputs.get(_input_key(name), "")
     if options.get("required") and not value:
         raise Exception(f"Input required and not supplied: {name}")
 
@@ -137,6 +312,54 @@ def get_multiline_input(name: str, **options: Unpack[InputOptions]) -> typing.Li
     return [i.strip() for i in inputs]
 
 
+# Line boundaries of `str.splitlines`, optionally with commas.
+_LINE_ENTRY = re.compile("[^\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]+")
+_LINE_OR_COMMA_ENTRY = re.compile("[^,\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]+")
+
+
+def iter_multiline_input(
+    name: str,
+    split_commas: bool = False,
+    unique: bool = False,
+    **options: Unpack[InputOptions],
+) -> typing.Iterator[str]:
+    """
+    Lazily yields the values of a multiline input, like `get_multiline_input`
+    but without building intermediate lists, for inputs with many entries.
+    Each value is trimmed unless trimWhitespace is set to false in InputOptions,
+    and values that are empty after trimming are skipped.
+    :param name: name of the input to get
+    :param split_commas: also split values on commas, e.g. `a, b` or `a\nb`
+    :param unique: skip values that were already yielded
+    :param options: See InputOptions.
+    """
+    value = _snapshot().inputs.get(_input_key(name), "")
+    if options.get("required") and not value:
+        raise Exception(f"Input required and not supplied: {name}")
+
+    pattern = _LINE_OR_COMMA_ENTRY if split_commas else _LINE_ENTRY
+    return _iter_entries(
+        pattern.finditer(value), options.get("trim_whitespace", True), unique
+    )
+
+
+def _iter_entries(
+    matches: typing.Iterator[typing.Match[str]], trim: bool, unique: bool
+) -> typing.Iterator[str]:
+    seen: typing.Set[str] = set()
+    for match in matches:
+        entry = match.group()
+        if trim:
+            entry = entry.strip()
+            if not entry:
+                continue
+        if unique:
+            if entry in seen:
+                continue
+            seen.add(entry)
+        yield entry
+
+
 def get_boolean_input(name: str, **options: Unpack[InputOptions]) -> bool:
     """
     Gets the input value of the boolean type in the YAML 1.2 "core schema"
@@ -167,14 +390,29 @@ def set_output(name: str, value: typing.Any) -> None:
     Sets the value of an output.
     :param name: name of the output to set
     :param value: value to store. Non-string values will be converted to a
-                  string via json.dumps
+                  string via json.dumps. Bytes, file objects, iterators of bytes
+                  or str and JSON arrays and objects are streamed into the
+                  output file in chunks instead of being converted as a whole.
     """
     file_path = os.getenv("GITHUB_OUTPUT")
     if file_path:
-        return issue_file_command("OUTPUT", prepare_key_value_message(name, value))
+        return issue_key_value_file_command("OUTPUT", name, value)
 
-    sys.stdout.write(os.linesep)
-    issue_command("set-output", {"name": name}, to_command_value(value))
+    get_writer().write(
+        os.linesep
+        + format_command("set-output", {"name": name}, materialize_value(value))
+    )
+
+
+def set_outputs(outputs: KeyValues) -> None:
+    """
+    Sets the values of many outputs with a single write. If a name appears more
+    than once, the last value wins.
+    :param outputs: mapping or (name, value) pairs. Non-string values will be
+                    converted to a string via json.dumps
+    """
+    converted = {name: materialize_value(val) for name, val in dict(outputs).items()}
+    _issue_key_value_commands("OUTPUT", "set-output", converted)
 
 
 def set_command_echo(enabled: bool) -> None:
@@ -197,18 +435,38 @@ def set_failed(message: typing.Union[str, Exception]) -> None:
     error(message)
 
 
+# Debug state used by `debug` for lazy messages, read once and refreshed by
+# `is_debug`.
+_debug_enabled: typing.Optional[bool] = None
+
+
 def is_debug() -> bool:
     """
     Gets whether Actions Step Debug is on or not
+    Also refreshes the state cached for lazy `debug` messages.
     """
-    return os.getenv("RUNNER_DEBUG") == "1"
+    global _debug_enabled
 
+    _debug_enabled = os.getenv("RUNNER_DEBUG") == "1"
+    return _debug_enabled
 
-def debug(message: str) -> None:
+
+def debug(
+    message: typing.Union[str, typing.Callable[[], typing.Any]], *args: typing.Any
+) -> None:
     """
     Writes debug message to user log
-    :param message: debug message
+    Lazy messages, a callable or a %-format string with args, are only
+    evaluated and written when Actions Step Debug is on.
+    :param message: debug message, format string or callable returning the
+                    message
+    :param args: arguments for the format string
     """
+    if callable(message) or args:
+        if not (is_debug() if _debug_enabled is None else _debug_enabled):
+            return
+        message = message() if callable(message) else message % args
+
     issue_command("debug", {}, message)
 
 
@@ -260,12 +518,87 @@ def notice(
     )
 
 
+def annotate_many(
+    records: typing.Iterable[AnnotationRecord],
+    limits: typing.Optional[
+        typing.Mapping[AnnotationLevel, typing.Optional[int]]
+    ] = None,
+) -> None:
+    """
+    Adds many annotations (errors, warnings and notices) in a single write.
+    Identical records are only emitted once and annotations are sorted by file
+    and line. Annotations past the limit for their type, counting those added
+    by earlier calls in the step, are dropped and counted in a notice added
+    when the step ends. The last notice of the limit is kept for it, so drops
+    are not reported when the notice limit is 0.
+    :param records: (level, message, properties) tuples. Errors will be
+                    converted to string via str()
+    :param limits: maximum number of annotations per type in the step, `None`
+                   for no limit. Defaults to ANNOTATION_LIMITS.
+    """
+    caps = {**ANNOTATION_LIMITS, **(limits or {})}
+    notice_cap = caps["notice"]
+    if notice_cap is not None:
+        caps["notice"] = max(notice_cap - 1, 0)
+    counts = _annotation_counts
+    suppressed: typing.Dict[str, int] = {}
+    seen: typing.Set[typing.Tuple[typing.Any, ...]] = set()
+    lines: typing.List[typing.Tuple[str, int, int, str]] = []
+
+    for level, message, properties in records:
+        if level not in caps:
+            raise Exception(f"Unsupported annotation level: {level}")
+
+        text = str(message) if isinstance(message, Exception) else message
+        command_properties = to_command_properties(properties or {})
+        key = (level, text, *command_properties.items())
+        if key in seen:
+            continue
+        seen.add(key)
+
+        cap = caps[level]
+        if cap is not None and counts.get(level, 0) >= cap:
+            suppressed[level] = suppressed.get(level, 0) + 1
+            continue
+        counts[level] = counts.get(level, 0) + 1
+
+        lines.append(
+            (
+                command_properties.get("file") or "",
+                command_properties.get("line") or 0,
+                len(lines),
+                format_command(level, command_properties, text),
+            )
+        )
+
+    lines.sort(key=lambda line: line[:3])
+    output = "".join(line[3] for line in lines)
+    if output:
+        get_writer().write(output)
+
+    if notice_cap != 0:
+        for kind, n in suppressed.items():
+            _suppressed_annotations[kind] = _suppressed_annotations.get(kind, 0) + n
+
+
+@atexit.register
+def _report_suppressed_annotations() -> None:
+    # Registered after the writer flushes at exit, so it runs before that.
+    if not _suppressed_annotations:
+        return
+
+    total = sum(_suppressed_annotations.values())
+    details = ", ".join(f"{n} {level}" for level, n in _suppressed_annotations.items())
+    _suppressed_annotations.clear()
+    issue_command("notice", {}, f"{total} more annotations suppressed ({details})")
+
+
 def info(message: str) -> None:
     """
-    Writes info to log with sys.stdout.write.
+    Writes info to log through the toolkit writer.
     :param message: info message
     """
-    sys.stdout.write(message + os.linesep)
+    get_writer().write(redactor.redact(message) + os.linesep)
 
 
 def start_group(name: str) -> None:
@@ -281,8 +614,13 @@ def start_group(name: str) -> None:
 def end_group() -> None:
     """
     End an output group.
+    Buffered output is flushed so the group closes right away, and lines
+    buffered by other threads are flushed first so they stay in the group.
     """
+    writer = get_writer()
+    writer.flush()
     issue("endgroup")
+    writer.flush()
 
 
 async def group(
@@ -314,13 +652,44 @@ def save_state(name: str, value: typing.Any) -> None:
     action's post job execution.
     :param name: name of the state to store
     :param value: value to store. Non-string values will be converted to a
-                  string via json.dumps
+                  string via json.dumps. Streamed values are handled like in
+                  `set_output`.
     """
     file_path = os.getenv("GITHUB_STATE")
     if file_path:
-        return issue_file_command("STATE", prepare_key_value_message(name, value))
+        return issue_key_value_file_command("STATE", name, value)
+
+    issue_command("save-state", {"name": name}, materialize_value(value))
+
+
+def save_states(states: KeyValues) -> None:
+    """
+    Saves many states for current action with a single write. If a name appears
+    more than once, the last value wins.
+    :param states: mapping or (name, value) pairs. Non-string values will be
+                   converted to a string via json.dumps
+    """
+    converted = {name: materialize_value(val) for name, val in dict(states).items()}
+    _issue_key_value_commands("STATE", "save-state", converted)
+
 
-    issue_command("save-state", {"name": name}, to_command_value(value))
+def _issue_key_value_commands(
+    file_command: str, command: str, values: typing.Mapping[str, str]
+) -> None:
+    if not values:
+        return
+
+    if os.getenv(f"GITHUB_{file_command}"):
+        return issue_key_value_file_commands(file_command, values)
+
+    # set-output has always been preceded by an empty line.
+    prefix = os.linesep if command == "set-output" else ""
+    get_writer().write(
+        "".join(
+            prefix + format_command(command, {"name": name}, value)
+            for name, value in values.items()
+        )
+    )
 
 
 def get_state(name: str) -> str:
@@ -328,4 +697,4 @@ def get_state(name: str) -> str:
     Gets the value of an state set by this action's main execution.
     :param name: name of the state to get
     """
-    return os.getenv(f"STATE_{name}", "")
+    return _snapshot().states.get(_state_key(name), "")
@@ -0,0 +1,94 @@
+import codecs
+import os
+import subprocess
+import typing
+import uuid
+
+from actions.core.command import issue_command
+from actions.core.core import end_group, start_group
+from actions.core.redaction import redactor
+from actions.core.writer import get_writer
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+def stream_exec(
+    args: typing.Union[str, typing.Sequence[str]],
+    group: typing.Optional[str] = None,
+    stop_commands: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **popen_kwargs: typing.Any,
+) -> int:
+    """
+    Runs a process and streams its output (stdout and stderr, interleaved as
+    they are produced) to the log through the toolkit writer.
+
+    Output is forwarded in large binary chunks, not line by line. By default
+    workflow commands are disabled while the process runs, so its output
+    cannot inject `::` commands.
+    :param args: program and arguments, see `subprocess.Popen`
+    :param group: wrap the output in a group with this name
+    :param stop_commands: stop processing workflow commands while the process
+                          runs
+    :param chunk_size: maximum number of bytes forwarded at once
+    :param popen_kwargs: additional `subprocess.Popen` arguments, e.g. `cwd`
+    :return: exit code of the process
+    """
+    writer = get_writer()
+    if group:
+        start_group(group)
+    token = uuid.uuid4().hex if stop_commands else None
+    if token:
+        issue_command("stop-commands", {}, token)
+
+    try:
+        with subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=0,
+            **popen_kwargs,
+        ) as process:
+            assert process.stdout is not None
+            fd = process.stdout.fileno()
+            ends_with_newline = True
+
+            if redactor:
+                # Secrets need text, so the output is decoded, and complete
+                # lines are redacted so secrets are never split. A line longer
+                # than a chunk (e.g. \r progress bars) is redacted up to where
+                # a secret could still be incomplete, so it is never held in
+                # memory as a whole.
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                pending = ""
+                while data := os.read(fd, chunk_size):
+                    text = pending + decoder.decode(data)
+                    lines, newline, pending = text.rpartition("\n")
+                    if newline:
+                        writer.write(redactor.redact(lines + newline))
+                        ends_with_newline = True
+                    if len(pending) > chunk_size:
+                        head, pending = redactor.redact_head(pending)
+                        if head:
+                            writer.write_bytes(memoryview(head.encode()))
+                            ends_with_newline = False
+                text = pending + decoder.decode(b"", final=True)
+                if text:
+                    writer.write(redactor.redact(text))
+                    ends_with_newline = text.endswith("\n")
+            else:
+                while data := os.read(fd, chunk_size):
+                    writer.write_bytes(memoryview(data))
+                    ends_with_newline = data.endswith(b"\n")
+
+            exit_code = process.wait()
+
+        if not ends_with_newline:
+            writer.write(os.linesep)
+    finally:
+        if token:
+            issue_command(token, {}, "")
+        if group:
+            end_group()
+
+    return exit_code
@@ -1,22 +1,205 @@
+import atexit
+import collections.abc
+import itertools
+import json
+import mmap
 import os
+import tempfile
+import threading
 import typing
 import uuid
 
+from actions.core import limits
+from actions.core._compat import Self
 from actions.core.utils import to_command_value
 
+# Values are read, encoded and written in chunks of this many bytes.
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+# Whether every file command checks its environment variable again, and
+# reopens the file when it points somewhere else. When disabled, the file
+# opened by the first command is used for the rest of the process.
+REVALIDATE_FILE_COMMAND_PATHS: bool = True
+
+_handles: typing.Dict[str, typing.Tuple[str, int]] = {}
+_handles_lock = threading.Lock()
+
+_readers: typing.Dict[str, "FileCommandReader"] = {}
+
 
 def issue_file_command(command: str, message: typing.Any) -> None:
+    """
+    Appends a record to the file of a file command (GITHUB_OUTPUT, GITHUB_ENV,
+    GITHUB_STATE, GITHUB_PATH...).
+
+    The file is opened once with O_APPEND and kept open. Every record is written
+    with a single unbuffered write, so records of concurrent processes never
+    interleave and there is nothing left to flush.
+    """
+    fd = _file_command_fd(command)
+    data = f"{to_command_value(message)}{os.linesep}".encode()
+    # A plain record cannot be truncated or spilled without breaking it.
+    limits.check_limit(command, len(data))
+    _write_all(fd, data)
+    limits.record_write(command, len(data))
+
+
+def issue_key_value_file_commands(
+    command: str, values: typing.Mapping[str, str]
+) -> None:
+    """
+    Appends many `key<<delimiter` records to the file of a file command with a
+    single write. If they do not fit in the size limit of the file, each record
+    is written on its own, so the limit policy applies to each value.
+    """
+    fd = _file_command_fd(command)
+    data = "".join(
+        f"{prepare_key_value_message(key, value)}{os.linesep}"
+        for key, value in values.items()
+    ).encode()
+    budget = limits.remaining_bytes(command)
+    if budget is not None and len(data) > budget:
+        for key, value in values.items():
+            issue_key_value_file_command(command, key, value)
+        return
+
+    _write_all(fd, data)
+    limits.record_write(command, len(data))
+
+
+def issue_key_value_file_command(
+    command: str,
+    key: str,
+    value: typing.Any,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> None:
+    """
+    Appends a `key<<delimiter` record to the file of a file command, streaming
+    the value in chunks, see `iter_key_value_message`.
+
+    Records that fit in `chunk_size` are written with a single write. Larger
+    records are spooled to a temporary file first and copied once complete,
+    so a value that fails partway never leaves a half-written record.
+
+    When the file has a size limit, see `actions.core.limits`, the value is
+    read up to the remaining budget before anything is written, and the limit
+    policy applies to values over it.
+    """
+    fd = _file_command_fd(command)
+    budget = limits.remaining_bytes(command)
+    if budget is not None:
+        # Not even an empty value fits, whatever the policy.
+        limits.check_limit(command, _record_overhead(key), f"'{key}'")
+        value = _fit_value(command, key, value, budget - _record_overhead(key))
+
+    buffer = bytearray()
+    with tempfile.TemporaryFile() as spool:
+        spooled = 0
+        for chunk in iter_key_value_message(key, value, chunk_size):
+            buffer += chunk
+            if len(buffer) >= chunk_size:
+                spool.write(buffer)
+                spooled += len(buffer)
+                buffer = bytearray()
+        buffer += os.linesep.encode()
+
+        if spooled:
+            spool.seek(0)
+            while chunk := spool.read(chunk_size):
+                _write_all(fd, chunk)
+        _write_all(fd, buffer)
+    limits.record_write(command, spooled + len(buffer))
+
+
+def close_file_commands() -> None:
+    """
+    Closes the files kept open by file commands. They are reopened on the next
+    file command. Called automatically at exit.
+    """
+    with _handles_lock:
+        for _, fd in _handles.values():
+            os.close(fd)
+        _handles.clear()
+
+
+atexit.register(close_file_commands)
+
+
+def read_file_command(command: str) -> "FileCommandReader":
+    """
+    Reads back the values recorded by a file command (OUTPUT, ENV, STATE) in
+    this step, e.g. in a composite action or post step.
+    Readers are kept per file, so repeated calls only parse appended records.
+    :param command: file command, e.g. "OUTPUT" for GITHUB_OUTPUT
+    :return: read-only mapping of the recorded values
+    """
     file_path = os.getenv(f"GITHUB_{command}")
     if not file_path:
         raise Exception(
             f"Unable to find environment variable for file command {command}"
         )
 
-    if not os.path.exists(file_path):
-        raise Exception(f"Missing file at path: {file_path}")
+    reader = _readers.get(file_path)
+    if reader is None:
+        reader = _readers[file_path] = FileCommandReader(file_path)
+    return reader.refresh()
+
+
+def _file_command_fd(command: str) -> int:
+    handle = _handles.get(command)
+    if handle and not REVALIDATE_FILE_COMMAND_PATHS:
+        return handle[1]
+
+    file_path = os.getenv(f"GITHUB_{command}")
+    if handle and handle[0] == file_path:
+        return handle[1]
+
+    if not file_path:
+        raise Exception(
+            f"Unable to find environment variable for file command {command}"
+        )
+
+    with _handles_lock:
+        previous = _handles.get(command)
+        if previous and previous[0] == file_path:
+            return previous[1]
+
+        try:
+            fd = os.open(
+                file_path, os.O_WRONLY | os.O_APPEND | getattr(os, "O_BINARY", 0)
+            )
+        except FileNotFoundError:
+            raise Exception(f"Missing file at path: {file_path}") from None
+
+        _handles[command] = (file_path, fd)
+        limits.track_file(command, file_path, os.fstat(fd).st_size)
+        if previous:
+            os.close(previous[1])
+    return fd
+
+
+def _write_all(fd: int, data: typing.Union[bytes, bytearray]) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+_DELIMITER_LENGTH = len(f"ghadelimiter_{uuid.UUID(int=0)}")
+
+
+def _record_overhead(key: str) -> int:
+    # `key<<delimiter`, the delimiter line and three line separators
+    return len(key.encode()) + 2 + 2 * _DELIMITER_LENGTH + 3 * len(os.linesep)
+
 
-    with open(file_path, "a", encoding="utf-8") as f:
-        f.write(f"{to_command_value(message)}{os.linesep}")
+def _fit_value(command: str, key: str, value: typing.Any, budget: int) -> bytes:
+    chunks = _iter_value_chunks(value, DEFAULT_CHUNK_SIZE)
+    head = bytearray()
+    for chunk in chunks:
+        head += chunk
+        if len(head) > budget:
+            return limits.apply_limit(command, f"'{key}'", bytes(head), chunks, budget)
+    return bytes(head)
 
 
 def prepare_key_value_message(key: str, value: typing.Any) -> str:
@@ -37,3 +220,212 @@ def prepare_key_value_message(key: str, value: typing.Any) -> str:
         )
 
     return f"{key}<<{delimiter}{os.linesep}{converted_value}{os.linesep}{delimiter}"
+
+
+def materialize_value(value: typing.Any) -> str:
+    """
+    Converts a value into a string like `to_command_value`, also accepting
+    bytes, file objects and iterators of bytes or str.
+    """
+    if isinstance(
+        value, (bytes, bytearray, memoryview, collections.abc.Iterator)
+    ) or hasattr(value, "read"):
+        return b"".join(_iter_value_chunks(value, DEFAULT_CHUNK_SIZE)).decode()
+    return to_command_value(value)
+
+
+def iter_key_value_message(
+    key: str, value: typing.Any, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> typing.Iterator[bytes]:
+    """
+    Same as `prepare_key_value_message`, but yields the UTF-8 encoded record in
+    chunks of about `chunk_size` bytes, without the trailing line separator.
+
+    Bytes, binary or text file objects, iterators of bytes or str, and JSON
+    arrays and objects are never held in memory as a whole; they are read or
+    encoded chunk by chunk and checked for the delimiter incrementally.
+    """
+    delimiter = f"ghadelimiter_{uuid.uuid4()}"
+    if delimiter in key:
+        raise Exception(
+            f'Unexpected input: name should not contain the delimiter "{delimiter}"'
+        )
+
+    yield f"{key}<<{delimiter}{os.linesep}".encode()
+
+    encoded_delimiter = delimiter.encode()
+    overlap = len(encoded_delimiter) - 1
+    tail = b""
+    for chunk in _iter_value_chunks(value, chunk_size):
+        # The delimiter may also straddle two chunks.
+        if encoded_delimiter in chunk or encoded_delimiter in tail + chunk[:overlap]:
+            raise Exception(
+                "Unexpected input: value should not contain the delimiter "
+                f'"{delimiter}"'
+            )
+        tail = (tail + chunk[-overlap:])[-overlap:]
+        yield chunk
+
+    yield f"{os.linesep}{delimiter}".encode()
+
+
+_json_encoder = json.JSONEncoder(separators=(",", ":"))
+
+# Number of items of a JSON array or object encoded at once.
+_JSON_BATCH_SIZE = 1024
+
+
+def _iter_value_chunks(value: typing.Any, chunk_size: int) -> typing.Iterator[bytes]:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        view = memoryview(value).cast("B")
+        for start in range(0, len(view), chunk_size):
+            yield bytes(view[start : start + chunk_size])
+    elif hasattr(value, "read"):
+        while chunk := value.read(chunk_size):
+            yield chunk.encode() if isinstance(chunk, str) else bytes(chunk)
+    elif isinstance(value, (dict, list, tuple)):
+        yield from _coalesce(_iter_json(value), chunk_size)
+    elif isinstance(value, collections.abc.Iterator):
+        yield from _coalesce(value, chunk_size)
+    else:
+        converted = to_command_value(value)
+        for start in range(0, len(converted), chunk_size):
+            yield converted[start : start + chunk_size].encode()
+
+
+def _iter_json(
+    value: typing.Union[dict, list, tuple],
+) -> typing.Iterator[str]:
+    # Only the outer array or object is streamed. Its items are encoded in
+    # batches by the C encoder, which is much faster than
+    # `JSONEncoder.iterencode`. The output is identical to `to_command_value`.
+    batches: typing.Iterator[typing.Any]
+    if isinstance(value, dict):
+        opening, closing = "{", "}"
+        items = iter(value.items())
+        batches = iter(lambda: dict(itertools.islice(items, _JSON_BATCH_SIZE)), {})
+    else:
+        opening, closing = "[", "]"
+        values = iter(value)
+        batches = iter(lambda: list(itertools.islice(values, _JSON_BATCH_SIZE)), [])
+
+    separator = opening
+    for batch in batches:
+        yield separator + _json_encoder.encode(batch)[1:-1]
+        separator = ","
+    yield opening + closing if separator == opening else closing
+
+
+def _coalesce(
+    pieces: typing.Iterable[typing.Union[str, bytes]], chunk_size: int
+) -> typing.Iterator[bytes]:
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece.encode() if isinstance(piece, str) else piece
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer = bytearray()
+    if buffer:
+        yield bytes(buffer)
+
+
+class FileCommandReader(typing.Mapping[str, str]):
+    """
+    Read-only view of the values recorded in a file command file (GITHUB_OUTPUT,
+    GITHUB_ENV, GITHUB_STATE), both `key<<delimiter` records and `key=value`
+    lines. When a key is recorded more than once, the last value wins.
+
+    The file is memory-mapped and `refresh` only parses what was appended since
+    the previous call. A record that is not complete yet is left for the next
+    call.
+    """
+
+    path: str
+    _offset: int
+    _values: typing.Dict[str, str]
+
+    def __init__(self, path: str) -> None:
+        """
+        :param path: path of the file to read, call `refresh` to parse it
+        """
+        self.path = path
+        self._offset = 0
+        self._values = {}
+
+    def __getitem__(self, key: str) -> str:
+        return self._values[key]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def refresh(self) -> Self:
+        """
+        Parses the records appended to the file since the last refresh. Starts
+        over if the file shrank.
+        :return: the reader
+        """
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < self._offset:
+                self._offset = 0
+                self._values = {}
+            if size > self._offset:
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as data:
+                    self._offset = self._parse(data, self._offset, size)
+        return self
+
+    def _parse(self, data: mmap.mmap, pos: int, end: int) -> int:
+        while pos < end:
+            line_end = data.find(b"\n", pos, end)
+            if line_end < 0:
+                break
+
+            line = data[pos:line_end]
+            newline = b"\r\n" if line.endswith(b"\r") else b"\n"
+            line = line[: len(line) + 1 - len(newline)]
+            if not line:
+                pos = line_end + 1
+                continue
+
+            equals = line.find(b"=")
+            heredoc = line.find(b"<<")
+            if equals >= 0 and (heredoc < 0 or equals < heredoc):
+                self._values[line[:equals].decode()] = line[equals + 1 :].decode()
+                pos = line_end + 1
+                continue
+
+            if heredoc < 0:
+                raise Exception(f"Invalid format '{line.decode()}' in {self.path}")
+
+            record = self._find_heredoc_value(
+                data, line_end + 1, end, line[heredoc + 2 :], newline
+            )
+            if record is None:
+                break
+            value, pos = record
+            self._values[line[:heredoc].decode()] = value.decode()
+        return pos
+
+    @staticmethod
+    def _find_heredoc_value(
+        data: mmap.mmap, start: int, end: int, delimiter: bytes, newline: bytes
+    ) -> typing.Optional[typing.Tuple[bytes, int]]:
+        """
+        Finds the line holding only the delimiter. The search starts at the end
+        of the header line, so a delimiter right after it is an empty value.
+        :return: the value and the position after the delimiter line, or None
+                 if the delimiter line was not written yet
+        """
+        found = data.find(b"\n" + delimiter, start - 1, end)
+        while found >= 0:
+            after = found + 1 + len(delimiter)
+            terminator = data[after : after + 2]
+            if terminator in (b"", b"\r", b"\r\n") or terminator.startswith(b"\n"):
+                value_end = max(found + 1 - len(newline), start)
+                line_end = data.find(b"\n", after, end)
+                return data[start:value_end], end if line_end < 0 else line_end + 1
+            found = data.find(b"\n" + delimiter, found + 1, end)
+        return None
@@ -0,0 +1,360 @@
+import concurrent.futures
+import glob
+import heapq
+import itertools
+import multiprocessing
+import os
+import typing
+from xml.etree import ElementTree
+
+from actions.core.core import AnnotationProperties, AnnotationRecord, annotate_many
+from actions.core.summary import Summary, summary
+
+JUnitOutcome = typing.Literal["passed", "failed", "error", "skipped"]
+
+# Reports are parsed in a process pool from this many files on.
+PROCESS_POOL_MIN_FILES = 4
+
+# Workers are not forked from this process, which may be running threads
+# (e.g. the flush timer of a buffered writer) whose locks a fork would copy.
+_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Failure details kept per test case, the rest of the output is dropped.
+MAX_DETAILS_LENGTH = 4096
+
+# Elements of a test case giving its outcome
+_OUTCOMES: typing.Dict[str, JUnitOutcome] = {
+    "failure": "failed",
+    "error": "error",
+    "skipped": "skipped",
+}
+
+
+class JUnitCase(typing.NamedTuple):
+    suite: str
+    classname: str
+    name: str
+    time: float
+    outcome: JUnitOutcome
+    # Failure, error or skip message
+    message: str = ""
+    # Start of the failure output, up to MAX_DETAILS_LENGTH characters
+    details: str = ""
+    file: typing.Optional[str] = None
+    line: typing.Optional[int] = None
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.classname}.{self.name}" if self.classname else self.name
+
+
+class JUnitReport:
+    """
+    Counts and timings of JUnit test cases, with the slowest test cases and
+    the first failing ones
+    """
+
+    def __init__(self, slowest: int = 10, max_failures: int = 100) -> None:
+        self.counts: typing.Dict[JUnitOutcome, int] = {
+            "passed": 0,
+            "failed": 0,
+            "error": 0,
+            "skipped": 0,
+        }
+        self.time = 0.0
+        # Failed and errored test cases, in report order
+        self.failures: typing.List[JUnitCase] = []
+        self.max_failures = max_failures
+        self.max_slowest = slowest
+        # Min-heap of (time, order, case), the fastest of the slowest first
+        self._slowest: typing.List[typing.Tuple[float, int, JUnitCase]] = []
+        self._order = 0
+
+    @property
+    def tests(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def slowest(self) -> typing.List[JUnitCase]:
+        """
+        Slowest test cases, slowest first
+        """
+        return [case for *_, case in sorted(self._slowest, reverse=True)]
+
+    def add(self, case: JUnitCase) -> None:
+        """
+        Adds a test case to the report
+        """
+        self.counts[case.outcome] += 1
+        self.time += case.time
+        if case.outcome in ("failed", "error") and (
+            len(self.failures) < self.max_failures
+        ):
+            self.failures.append(case)
+
+        self._rank(case)
+
+    def _keeps(self, time: float) -> bool:
+        # Whether a test case that took this long is one of the slowest.
+        return len(self._slowest) < self.max_slowest or (
+            bool(self._slowest) and time > self._slowest[0][0]
+        )
+
+    def merge(self, other: "JUnitReport") -> "JUnitReport":
+        """
+        Adds the counts and test cases of another report to this one
+        :return: this report
+        """
+        for outcome, count in other.counts.items():
+            self.counts[outcome] += count
+        self.time += other.time
+        room = max(self.max_failures - len(self.failures), 0)
+        self.failures.extend(other.failures[:room])
+        for case in other.slowest:
+            self._rank(case)
+        return self
+
+    def _rank(self, case: JUnitCase) -> None:
+        self._order += 1
+        # Ties are broken by order, earlier cases rank higher.
+        entry = (case.time, -self._order, case)
+        if len(self._slowest) < self.max_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif self._slowest and entry[:2] > self._slowest[0][:2]:
+            heapq.heapreplace(self._slowest, entry)
+
+
+def parse_junit(path: str, slowest: int = 10, max_failures: int = 100) -> JUnitReport:
+    """
+    Reads a JUnit XML report incrementally. Test cases are dropped from the
+    tree as soon as they are counted, so memory stays bounded however large
+    the report is.
+    :param path: path of the report
+    :param slowest: number of slowest test cases to keep
+    :param max_failures: number of failing test cases to keep
+    :return: report
+    """
+    report = JUnitReport(slowest, max_failures)
+    # Open elements, the parents of the current one
+    stack: typing.List[ElementTree.Element] = []
+    suites: typing.List[str] = []
+    counts = report.counts
+    for event, elem in ElementTree.iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == "testsuite":
+                suites.append(elem.get("name", ""))
+            continue
+
+        stack.pop()
+        if elem.tag == "testcase":
+            time = _read_time(elem.get("time"))
+            if len(elem) == 0 and not report._keeps(time):
+                # Passed, and not one of the slowest: only counted.
+                counts["passed"] += 1
+                report.time += time
+            else:
+                report.add(_read_case(elem, suites[-1] if suites else "", time))
+        elif elem.tag == "testsuite":
+            suites.pop()
+        elif elem.tag in _OUTCOMES and stack and stack[-1].tag == "testcase":
+            # Read with their test case.
+            continue
+
+        # Nothing holds on to the element (or its output) any more.
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+    return report
+
+
+def read_junit(
+    paths: typing.Union[str, typing.Iterable[str]],
+    slowest: int = 10,
+    max_failures: int = 100,
+    processes: typing.Optional[int] = None,
+) -> JUnitReport:
+    """
+    Reads JUnit XML reports, in a process pool when there are many of them
+    :param paths: paths or glob patterns (e.g. "reports/**/*.xml") of reports
+    :param slowest: number of slowest test cases to keep
+    :param max_failures: number of failing test cases to keep
+    :param processes: maximum number of processes, 1 reads the reports in
+                      this process. Defaults to the number of CPUs. Like with
+                      any process pool that is not forked, the main module of
+                      the action is imported by the workers, so it must call
+                      this under `if __name__ == "__main__":`
+    :return: report of all test cases
+    """
+    files = _expand(paths)
+    report = JUnitReport(slowest, max_failures)
+    if len(files) < PROCESS_POOL_MIN_FILES or processes == 1:
+        for path in files:
+            report.merge(parse_junit(path, slowest, max_failures))
+        return report
+
+    context = multiprocessing.get_context(_START_METHOD)
+    with concurrent.futures.ProcessPoolExecutor(processes, context) as executor:
+        reports = executor.map(
+            parse_junit,
+            files,
+            itertools.repeat(slowest),
+            itertools.repeat(max_failures),
+        )
+        for file_report in reports:
+            report.merge(file_report)
+    return report
+
+
+def annotate_junit_failures(report: JUnitReport) -> None:
+    """
+    Adds an error annotation for each failing test case, on its file and line
+    when the report has them
+    """
+    records: typing.List[AnnotationRecord] = []
+    for case in report.failures:
+        properties: AnnotationProperties = {"title": case.full_name}
+        if case.file:
+            properties["file"] = case.file
+        if case.line is not None:
+            properties["start_line"] = case.line
+        message = case.message or case.details or case.outcome
+        records.append(("error", message, properties))
+    annotate_many(records)
+
+
+def add_junit_summary(
+    report: JUnitReport,
+    title: str = "Test results",
+    target: typing.Optional[Summary] = None,
+) -> Summary:
+    """
+    Adds the counts of a report to a summary, with tables of the failing and
+    slowest test cases
+    :param report: report to add
+    :param title: heading of the section
+    :param target: summary to add to, defaults to the job summary
+    :return: summary
+    """
+    target = target or summary
+    counts = report.counts
+    target.add_heading(title, 2)
+    target.add_raw(
+        target.wrap(
+            "p",
+            f"{report.tests} tests: {counts['passed']} passed, "
+            f"{counts['failed']} failed, {counts['error']} errors, "
+            f"{counts['skipped']} skipped in {report.time:.2f}s",
+        ),
+        add_eol=True,
+    )
+
+    failing = counts["failed"] + counts["error"]
+    if report.failures:
+        target.add_heading("Failing tests", 3)
+        header = [
+            {"data": "Test", "header": True},
+            {"data": "Message", "header": True},
+            {"data": "Time", "header": True},
+        ]
+        rows = (
+            [
+                case.full_name,
+                _first_line(case.message or case.details),
+                f"{case.time:.3f}s",
+            ]
+            for case in report.failures
+        )
+        target.add_table([header, *rows])
+        if failing > len(report.failures):
+            target.add_raw(
+                target.wrap("p", f"{failing - len(report.failures)} more not shown"),
+                add_eol=True,
+            )
+
+    slowest = report.slowest
+    if slowest:
+        target.add_heading("Slowest tests", 3)
+        header = [
+            {"data": "Test", "header": True},
+            {"data": "Result", "header": True},
+            {"data": "Time", "header": True},
+        ]
+        rows = ([case.full_name, case.outcome, f"{case.time:.3f}s"] for case in slowest)
+        target.add_table([header, *rows])
+    return target
+
+
+def report_junit(
+    paths: typing.Union[str, typing.Iterable[str]],
+    title: str = "Test results",
+    slowest: int = 10,
+    processes: typing.Optional[int] = None,
+) -> JUnitReport:
+    """
+    Reads JUnit XML reports, annotates the failing test cases and adds the
+    results to the job summary, which still has to be written
+    :param paths: paths or glob patterns (e.g. "reports/**/*.xml") of reports
+    :param title: heading of the summary section
+    :param slowest: number of slowest test cases in the summary
+    :param processes: maximum number of processes, see `read_junit`
+    :return: report of all test cases
+    """
+    report = read_junit(paths, slowest=slowest, processes=processes)
+    annotate_junit_failures(report)
+    add_junit_summary(report, title)
+    return report
+
+
+def _read_case(elem: ElementTree.Element, suite: str, time: float) -> JUnitCase:
+    outcome: JUnitOutcome = "passed"
+    message = details = ""
+    for child in elem:
+        if child.tag in _OUTCOMES:
+            outcome = _OUTCOMES[child.tag]
+            message = child.get("message") or ""
+            details = (child.text or "").strip()[:MAX_DETAILS_LENGTH]
+            break
+
+    line = elem.get("line")
+    return JUnitCase(
+        suite=suite,
+        classname=elem.get("classname", ""),
+        name=elem.get("name", ""),
+        time=time,
+        outcome=outcome,
+        message=message,
+        details=details,
+        file=elem.get("file") or None,
+        line=int(line) if line and line.isdigit() else None,
+    )
+
+
+def _first_line(text: str) -> str:
+    return text.splitlines()[0] if text else ""
+
+
+def _read_time(value: typing.Optional[str]) -> float:
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        # e.g. "1,250.0"
+        return float(value.replace(",", ""))
+    except ValueError:
+        return 0.0
+
+
+def _expand(paths: typing.Union[str, typing.Iterable[str]]) -> typing.List[str]:
+    files: typing.Dict[str, None] = {}
+    for path in [paths] if isinstance(paths, str) else paths:
+        if any(c in path for c in "*?["):
+            files.update(dict.fromkeys(sorted(glob.glob(path, recursive=True))))
+        else:
+            files[os.path.normpath(path)] = None
+    return list(files)
@@ -0,0 +1,219 @@
+import os
+import tempfile
+import threading
+import typing
+import uuid
+
+from actions.core.command import issue_command
+
+# What happens to a value that does not fit in the remaining budget of a file:
+# - "raise": nothing is written and an exception is raised
+# - "truncate": the value is cut to fit
+# - "spill": the value is written to a file in RUNNER_TEMP, and its path is
+#   written instead, or nothing if the path does not fit either
+LimitPolicy = typing.Literal["raise", "truncate", "spill"]
+
+
+class FileCommandLimit(typing.NamedTuple):
+    # Maximum size of the file, in bytes
+    max_bytes: int
+
+    # What to do with values over the limit
+    policy: LimitPolicy = "raise"
+
+
+# Size limits enforced by the runner, by file command. Step summaries larger
+# than 1 MiB are not uploaded. Other files have no default limit, e.g. the
+# runner caps job outputs rather than GITHUB_OUTPUT, see `set_limit`.
+DEFAULT_LIMITS: typing.Dict[str, FileCommandLimit] = {
+    "STEP_SUMMARY": FileCommandLimit(1024 * 1024),
+}
+
+TRUNCATED_SUFFIX = "…"
+
+_limits: typing.Dict[str, FileCommandLimit] = dict(DEFAULT_LIMITS)
+
+# Path and number of bytes of each file written, by file command
+_usage: typing.Dict[str, typing.Tuple[str, int]] = {}
+_usage_lock = threading.Lock()
+
+
+def set_limit(
+    command: str,
+    max_bytes: typing.Optional[int],
+    policy: LimitPolicy = "raise",
+) -> None:
+    """
+    Sets the size limit of a file command file
+    :param command: file command, e.g. "OUTPUT" or "STEP_SUMMARY"
+    :param max_bytes: maximum size of the file in bytes, None for no limit
+    :param policy: what to do with values over the limit, see `LimitPolicy`
+    """
+    if policy not in typing.get_args(LimitPolicy):
+        raise Exception(f"Unsupported limit policy: {policy}")
+
+    if max_bytes is None:
+        _limits.pop(command, None)
+    else:
+        _limits[command] = FileCommandLimit(max_bytes, policy)
+
+
+def get_limit(command: str) -> typing.Optional[FileCommandLimit]:
+    """
+    Gets the size limit of a file command file
+    :param command: file command, e.g. "OUTPUT" or "STEP_SUMMARY"
+    """
+    return _limits.get(command)
+
+
+def get_usage() -> typing.Dict[str, int]:
+    """
+    Gets the number of bytes in each file command file written by this process,
+    including what the file already held when it was first opened
+    :return: number of bytes, by file command
+    """
+    return {command: size for command, (_, size) in _usage.items()}
+
+
+def reset_limits() -> None:
+    """
+    Restores the default limits and forgets the usage counters
+    """
+    _limits.clear()
+    _limits.update(DEFAULT_LIMITS)
+    with _usage_lock:
+        _usage.clear()
+
+
+def track_file(command: str, path: str, size: int) -> None:
+    """
+    Starts counting the bytes written to a file, unless it is already counted
+    :param command: file command
+    :param path: path of the file
+    :param size: current size of the file
+    """
+    with _usage_lock:
+        usage = _usage.get(command)
+        if not usage or usage[0] != path:
+            _usage[command] = (path, size)
+
+
+def reset_file(command: str, path: str) -> None:
+    """
+    Restarts counting from zero, after the file was overwritten
+    """
+    with _usage_lock:
+        _usage[command] = (path, 0)
+
+
+def record_write(command: str, size: int) -> None:
+    """
+    Adds written bytes to the counter of a file command
+    """
+    with _usage_lock:
+        path, used = _usage.get(command, ("", 0))
+        _usage[command] = (path, used + size)
+
+
+def remaining_bytes(command: str) -> typing.Optional[int]:
+    """
+    :return: number of bytes that can still be written, None if unlimited
+    """
+    limit = _limits.get(command)
+    if limit is None:
+        return None
+    _, used = _usage.get(command, ("", 0))
+    return max(limit.max_bytes - used, 0)
+
+
+def check_limit(command: str, size: int, name: str = "record") -> None:
+    """
+    Raises if writing `size` more bytes would exceed the limit of a file
+    command, whatever its policy
+    """
+    budget = remaining_bytes(command)
+    if budget is not None and size > budget:
+        raise _limit_exceeded(command, name)
+
+
+def apply_limit(
+    command: str,
+    name: str,
+    head: bytes,
+    rest: typing.Iterator[bytes],
+    budget: int,
+) -> bytes:
+    """
+    Applies the policy of a file command to a value over its budget.
+    :param command: file command
+    :param name: description of the value, e.g. the quoted output name
+    :param head: first bytes of the value, more than `budget`
+    :param rest: remaining chunks of the value, not read yet
+    :param budget: number of bytes left for the value
+    :return: the value to write instead
+    """
+    limit = _limits[command]
+    if limit.policy == "raise":
+        raise _limit_exceeded(command, name)
+
+    if limit.policy == "truncate":
+        suffix = TRUNCATED_SUFFIX.encode()
+        value = _cut(head, budget - len(suffix)) + suffix
+        issue_command("warning", {}, f"{name} was truncated to fit in GITHUB_{command}")
+        return value if len(value) <= budget else b""
+
+    path = spill(command, name, head, rest)
+    issue_command(
+        "warning",
+        {},
+        f"{name} does not fit in GITHUB_{command} and was written to {path}",
+    )
+    value = path.encode()
+    return value if len(value) <= budget else b""
+
+
+def spill_path(command: str, name: str) -> str:
+    """
+    Picks the path of a new file in RUNNER_TEMP, see `spill`
+    :return: path of the file
+    """
+    directory = os.path.join(
+        os.getenv("RUNNER_TEMP") or tempfile.gettempdir(), "actions-python-core"
+    )
+    safe_name = "".join(
+        c if c.isalnum() or c in "-_." else "_" for c in name.strip("'")
+    )
+    return os.path.join(directory, f"{command.lower()}-{safe_name}-{uuid.uuid4()}")
+
+
+def spill(
+    command: str,
+    name: str,
+    head: bytes,
+    rest: typing.Iterable[bytes] = (),
+    path: typing.Optional[str] = None,
+) -> str:
+    """
+    Writes a value to a new file in RUNNER_TEMP
+    :param path: path of the file, picked with `spill_path` when not given
+    :return: path of the file
+    """
+    path = path or spill_path(command, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(head)
+        for chunk in rest:
+            f.write(chunk)
+    return path
+
+
+def _limit_exceeded(command: str, name: str) -> Exception:
+    return Exception(
+        f"Unable to write {name}: GITHUB_{command} would exceed its limit of "
+        f"{_limits[command].max_bytes} bytes"
+    )
+
+
+def _cut(data: bytes, size: int) -> bytes:
+    # Never cut a UTF-8 sequence in half.
+    return data[: max(size, 0)].decode("utf-8", errors="ignore").encode()
@@ -0,0 +1,227 @@
+import itertools
+import re
+import threading
+import typing
+
+REDACTED = "***"
+
+# Up to this many secrets, text is scanned with the trie pattern alone.
+PREFILTER_MIN_SECRETS = 16
+
+# Length of the substrings of secrets looked up by the prefilter
+GRAM_LENGTH = 4
+
+_END = ""
+
+_Trie = typing.Dict[str, typing.Any]
+
+
+class _Matcher(typing.NamedTuple):
+    # Matches the longest secret at a position
+    pattern: typing.Pattern[str]
+    # Substrings at the start of secrets, with their offsets in the secrets.
+    # None when the text is scanned with the pattern alone.
+    grams: typing.Optional[typing.Dict[str, typing.Tuple[int, ...]]]
+    gram_length: int
+    # Distance between the positions of the text looked up
+    stride: int
+
+
+class Redactor:
+    """
+    Registry of secrets that are masked in the log output and step summary
+    written by the toolkit. File commands read by later steps (outputs,
+    environment variables, state) keep the real values.
+
+    Secrets are matched with one regular expression compiled from a trie of
+    the registered values. Scanning every position of a text with it gets
+    slower as secrets are added, so past PREFILTER_MIN_SECRETS the pattern
+    only confirms candidates: with secrets of at least `m` characters, every
+    occurrence holds one of the first `m - GRAM_LENGTH + 1` substrings of
+    its secret at a multiple of that stride, so only those positions are
+    looked up in a table of substrings. The cost of a scan then depends on
+    the length of the shortest secret, not on the number of secrets.
+    """
+
+    _secrets: typing.Set[str]
+    _matcher: typing.Optional[_Matcher]
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self._secrets = set()
+        self._matcher = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._secrets)
+
+    def add(self, secret: str) -> None:
+        """
+        Registers a secret. Like the runner, every line of a multiline secret is
+        also registered on its own.
+        :param secret: value of the secret
+        """
+        values = {secret, *secret.splitlines()}
+        values.discard("")
+        with self._lock:
+            if values - self._secrets:
+                self._secrets |= values
+                self._matcher = None
+
+    def clear(self) -> None:
+        """
+        Forgets all registered secrets
+        """
+        with self._lock:
+            self._secrets = set()
+            self._matcher = None
+
+    def redact(self, text: str) -> str:
+        """
+        Replaces every registered secret in the text with `***`. Overlapping
+        secrets are replaced by the longest match.
+        :param text: text to redact
+        :return: redacted text, the same object when nothing was replaced
+        """
+        if not self._secrets:
+            return text
+
+        matcher = self._matcher or self._compile()
+        if matcher.grams is None:
+            return matcher.pattern.sub(REDACTED, text)
+
+        pieces = []
+        pos = 0
+        for start, end in _find(matcher, text):
+            pieces += [text[pos:start], REDACTED]
+            pos = end
+        if not pieces:
+            return text
+        pieces.append(text[pos:])
+        return "".join(pieces)
+
+    def redact_head(self, text: str) -> typing.Tuple[str, str]:
+        """
+        Redacts the start of a text that is still being received, e.g. a long
+        line of process output. The end of the text, where a secret may still
+        be incomplete, is returned as is, to be redacted with what follows.
+        :param text: text received so far
+        :return: redacted head of the text, and the rest of the text
+        """
+        if not self._secrets:
+            return text, ""
+
+        matcher = self._matcher or self._compile()
+        # A secret starting before the cut ends within the text.
+        cut = max(len(text) - max(map(len, self._secrets)) + 1, 0)
+        pieces = []
+        pos = 0
+        for start, end in _find(matcher, text):
+            if start >= cut:
+                break
+            pieces += [text[pos:start], REDACTED]
+            pos = end
+        split = max(pos, cut)
+        pieces.append(text[pos:split])
+        return "".join(pieces), text[split:]
+
+    def _compile(self) -> _Matcher:
+        with self._lock:
+            if self._matcher is None:
+                trie: _Trie = {}
+                for secret in self._secrets:
+                    node = trie
+                    for char in secret:
+                        node = node.setdefault(char, {})
+                    node[_END] = True
+
+                try:
+                    pattern = re.compile(_trie_pattern(trie))
+                except RecursionError:
+                    # Deeply nested tries (many secrets that are prefixes of
+                    # each other) fall back to a plain, longest-first pattern.
+                    by_length = sorted(self._secrets, key=len, reverse=True)
+                    pattern = re.compile("|".join(map(re.escape, by_length)))
+
+                if len(self._secrets) <= PREFILTER_MIN_SECRETS:
+                    self._matcher = _Matcher(pattern, None, 0, 1)
+                else:
+                    self._matcher = _prefilter(pattern, self._secrets)
+            return self._matcher
+
+
+def _prefilter(pattern: typing.Pattern[str], secrets: typing.Set[str]) -> _Matcher:
+    shortest = min(map(len, secrets))
+    gram_length = min(shortest, GRAM_LENGTH)
+    stride = shortest - gram_length + 1
+    offsets: typing.Dict[str, typing.Set[int]] = {}
+    for secret in secrets:
+        for offset in range(stride):
+            gram = secret[offset : offset + gram_length]
+            offsets.setdefault(gram, set()).add(offset)
+    grams = {gram: tuple(found) for gram, found in offsets.items()}
+    return _Matcher(pattern, grams, gram_length, stride)
+
+
+def _find(matcher: _Matcher, text: str) -> typing.Iterator[typing.Tuple[int, int]]:
+    # Spans of the secrets in the text, like `finditer` with the pattern.
+    grams = matcher.grams
+    if grams is None:
+        yield from (match.span() for match in matcher.pattern.finditer(text))
+        return
+
+    q = matcher.gram_length
+    positions = range(0, len(text) - q + 1, matcher.stride)
+    # Looked up with C-level iteration, this is the part that sees all text.
+    windows = map(
+        text.__getitem__, map(slice, positions, itertools.count(q, matcher.stride))
+    )
+    hits = itertools.compress(positions, map(grams.__contains__, windows))
+    starts = sorted(
+        {p - offset for p in hits for offset in grams[text[p : p + q]] if p >= offset}
+    )
+
+    pos = 0
+    for start in starts:
+        if start < pos:
+            continue
+        match = matcher.pattern.match(text, start)
+        if match:
+            pos = match.end()
+            yield start, pos
+
+
+def _trie_pattern(node: _Trie) -> str:
+    alternatives = []
+    for char in sorted(node):
+        if char == _END:
+            continue
+
+        # Chains of single-child nodes become one literal.
+        prefix, child = char, node[char]
+        while len(child) == 1 and _END not in child:
+            ((char, child),) = child.items()
+            prefix += char
+        alternatives.append(re.escape(prefix) + _trie_pattern(child))
+
+    if not alternatives:
+        return ""
+
+    pattern = (
+        alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+    )
+    # Continuing past a complete secret is optional, and greedy, so the
+    # longest registered secret wins.
+    return f"(?:{pattern})?" if _END in node else pattern
+
+
+redactor = Redactor()
+
+
+def redact(text: str) -> str:
+    """
+    Masks all secrets registered with `set_secret` in the text
+    :param text: text to redact
+    :return: redacted text
+    """
+    return redactor.redact(text)
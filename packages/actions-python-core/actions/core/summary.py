@@ -1,9 +1,21 @@
+import asyncio
+import functools
 import os
+import threading
 import typing
 
-import aiofiles.os
-
+from actions.core import limits
 from actions.core._compat import Self, Unpack
+from actions.core.command import issue_command
+from actions.core.redaction import redactor
+from actions.core.summary_renderers import (  # noqa: F401
+    HtmlRenderer,
+    Raw,
+    RowTemplate,
+)
+
+if typing.TYPE_CHECKING:
+    import csv
 
 SUMMARY_ENV_VAR = "GITHUB_STEP_SUMMARY"
 SUMMARY_DOCS_URL = "https://docs.github.com/actions/using-workflows/workflow-commands-for-github-actions#adding-a-job-summary"
@@ -39,12 +51,101 @@ class SummaryWriteOptions(typing.TypedDict, total=False):
     overwrite: bool
 
 
+# Rows of a table: any iterable of rows, a csv.DictReader, or a columnar source
+# (pyarrow Table or RecordBatch, NumPy array), see `Summary.add_table`
+SummaryTableSource = typing.Union[typing.Iterable[SummaryTableRow], typing.Any]
+
+# Number of rows rendered at once by `Summary.add_table`
+TABLE_CHUNK_ROWS = 1000
+
+# Notice added to size-aware summaries when elements do not fit
+SIZE_NOTICE = "{count} summary sections did not fit and were written to {path}"
+PAGE_OVERHEAD = len("<details><summary>Page 100000</summary></details>") + 3 * 2
+
+
+def _table_source(
+    source: SummaryTableSource,
+) -> typing.Tuple[typing.Optional[SummaryTableRow], typing.Iterable[SummaryTableRow]]:
+    """
+    :return: the header row built from column names, if any, and the rows
+    """
+    if hasattr(source, "fieldnames"):
+        # csv.DictReader
+        fieldnames = source.fieldnames or []
+        reader = typing.cast("csv.DictReader[str]", source)
+        return _header_row(fieldnames), _iter_dict_rows(reader, fieldnames)
+    if hasattr(source, "column_names") and hasattr(source, "columns"):
+        # pyarrow Table or RecordBatch
+        return _header_row(source.column_names), _iter_arrow_rows(source)
+    if hasattr(source, "dtype") and hasattr(source, "tolist"):
+        # NumPy array, structured arrays have column names
+        names = source.dtype.names
+        return _header_row(names) if names else None, _iter_array_rows(source)
+    return None, source
+
+
+def _header_row(names: typing.Iterable[str]) -> SummaryTableRow:
+    return [{"data": name, "header": True} for name in names]
+
+
+def _iter_dict_rows(
+    reader: typing.Iterable[typing.Dict[str, typing.Any]],
+    fieldnames: typing.Sequence[str],
+) -> typing.Iterator[SummaryTableRow]:
+    for row in reader:
+        yield [row.get(name) or "" for name in fieldnames]
+
+
+def _iter_arrow_rows(table: typing.Any) -> typing.Iterator[SummaryTableRow]:
+    batches = (
+        table.to_batches(max_chunksize=TABLE_CHUNK_ROWS)
+        if hasattr(table, "to_batches")
+        else [table]
+    )
+    for batch in batches:
+        yield from zip(*(column.to_pylist() for column in batch.columns))
+
+
+def _iter_array_rows(array: typing.Any) -> typing.Iterator[SummaryTableRow]:
+    for start in range(0, len(array), TABLE_CHUNK_ROWS):
+        chunk = array[start : start + TABLE_CHUNK_ROWS].tolist()
+        yield from (row if isinstance(row, (list, tuple)) else [row] for row in chunk)
+
+
 class Summary:
-    _buffer: str
+    # Number of buffered characters that triggers a write to the summary file,
+    # see `auto_flush`
+    auto_flush_threshold: typing.Optional[int]
+
+    # Renders the elements added with the `add_*` methods, see `set_renderer`.
+    # Text and attribute values are escaped unless wrapped in `Raw`.
+    renderer: HtmlRenderer
+
+    # Whether writes are fitted in the size limit, see `size_aware`
+    size_aware_enabled: bool
+    page_bytes: typing.Optional[int]
+
+    _lock: threading.RLock
+    _pending_sections: typing.List["SummarySection"]
+    _chunks: typing.List[str]
+    _length: int
+    _size: int
+    _boundaries: typing.List[int]
+    _pages: int
     _file_path: typing.Optional[str]
 
     def __init__(self) -> None:
-        self._buffer = ""
+        self.auto_flush_threshold = None
+        self.renderer = HtmlRenderer()
+        self.size_aware_enabled = False
+        self.page_bytes = None
+        self._lock = threading.RLock()
+        self._pending_sections = []
+        self._chunks = []
+        self._length = 0
+        self._size = 0
+        self._boundaries = []
+        self._pages = 0
         self._file_path = None
 
     async def file_path(self) -> str:
@@ -54,6 +155,9 @@ class Summary:
         Also checks r/w permissions.
         :return: step summary file path
         """
+        return self._find_file_path()
+
+    def _find_file_path(self) -> str:
         if self._file_path:
             return self._file_path
 
@@ -64,7 +168,7 @@ class Summary:
                 "Check if your runtime environment supports job summaries."
             )
 
-        if not await aiofiles.os.access(path_from_env, os.R_OK | os.W_OK):
+        if not os.access(path_from_env, os.R_OK | os.W_OK):
             raise Exception(
                 f"Unable to access summary file: '{path_from_env}'. "
                 "Check if the file has correct read/write permissions."
@@ -86,26 +190,206 @@ class Summary:
         :param attrs: key-value list of HTML attributes to add
         :return: content wrapped in HTML element
         """
-        attrs = attrs or {}
-        html_attrs = "".join([f' {key}="{value}"' for key, value in attrs.items()])
-        if not content:
-            return f"<{tag}{html_attrs}>"
+        return self.renderer.wrap(tag, content, attrs)
 
-        return f"<{tag}{html_attrs}>{content}</{tag}>"
+    def set_renderer(self, renderer: HtmlRenderer) -> Self:
+        """
+        Sets how elements are rendered, e.g. `MarkdownRenderer` or
+        `MinifiedHtmlRenderer` for a smaller summary. Elements already in the
+        buffer are not rendered again.
+        :param renderer: the renderer
+        :return: summary instance
+        """
+        self.renderer = renderer
+        return self
 
     async def write(self, **options: Unpack[SummaryWriteOptions]) -> Self:
         """
         Writes text in the buffer to the summary buffer file and empties buffer.
-        Will append by default.
+        Will append by default. Secrets registered with `set_secret` are masked.
+        The size limit of the summary file is enforced, see
+        `actions.core.limits`.
+        Runs `write_sync` in the default executor, in a single call.
+        :return: summary instance
+        """
+        loop = asyncio.get_running_loop()
+        write = functools.partial(self.write_sync, **options)
+        return await loop.run_in_executor(None, write)
+
+    def write_sync(self, **options: Unpack[SummaryWriteOptions]) -> Self:
+        """
+        Same as `write`, without an event loop. The buffer is written with a
+        single unbuffered write to the file, opened with O_APPEND.
+        :return: summary instance
+        """
+        file_path = self._find_file_path()
+        overwrite = options.get("overwrite", False)
+        with self._lock:
+            # Committed sections behind an open one are not in the buffer yet.
+            held = sum(s.state == "committed" for s in self._pending_sections)
+            if held:
+                issue_command(
+                    "warning",
+                    {},
+                    f"{held} committed summary sections are not written, they "
+                    "wait for a section started before them that is still open",
+                )
+            data = self._prepare_write(file_path, overwrite)
+
+            flags = os.O_WRONLY | (os.O_TRUNC if overwrite else os.O_APPEND)
+            fd = os.open(file_path, flags | getattr(os, "O_BINARY", 0))
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view) :]
+            finally:
+                os.close(fd)
+            limits.record_write("STEP_SUMMARY", len(data))
+            return self.empty_buffer()
+
+    def _prepare_write(self, file_path: str, overwrite: bool) -> bytes:
+        if overwrite:
+            limits.reset_file("STEP_SUMMARY", file_path)
+            self._pages = 0
+        else:
+            limits.track_file("STEP_SUMMARY", file_path, os.stat(file_path).st_size)
+
+        budget = limits.remaining_bytes("STEP_SUMMARY")
+        if self.size_aware_enabled:
+            return self._fit_sections(budget)
+
+        data = redactor.redact(self.stringify()).encode()
+        if budget is not None and len(data) > budget:
+            data = self._apply_limit(data, budget)
+        return data
+
+    def _sections(self) -> typing.Iterator[bytes]:
+        text = self.stringify()
+        start = 0
+        for end in [*self._boundaries, len(text)]:
+            if end > start:
+                yield redactor.redact(text[start:end]).encode()
+                start = end
+
+    def _fit_sections(self, budget: typing.Optional[int]) -> bytes:
+        written = limits.get_usage().get("STEP_SUMMARY", 0)
+        path = ""
+        capacity = None
+        if budget is not None:
+            # Leave room for the notice, should anything overflow.
+            path = limits.spill_path("STEP_SUMMARY", "summary")
+            capacity = budget - len(self._size_notice(len(self._boundaries) + 1, path))
+
+        out: typing.List[bytes] = []
+        page: typing.List[bytes] = []
+        page_size = 0
+        used = 0
+        overflow: typing.List[bytes] = []
+        for section in self._sections():
+            if overflow:
+                overflow.append(section)
+                continue
+
+            visible = self.page_bytes is None or (
+                not page and written + used + len(section) <= self.page_bytes
+            )
+            if visible:
+                added = len(section)
+            else:
+                if page and page_size + len(section) > self.page_bytes:  # type: ignore[operator]
+                    out.append(self._close_page(page))
+                    page, page_size = [], 0
+                # A new page adds the details tags.
+                added = len(section) + (0 if page else PAGE_OVERHEAD)
+
+            if capacity is not None and used + added > capacity:
+                overflow.append(section)
+                continue
+
+            used += added
+            if visible:
+                out.append(section)
+            else:
+                page.append(section)
+                page_size += len(section)
+
+        if page:
+            out.append(self._close_page(page))
+        if overflow:
+            limits.spill("STEP_SUMMARY", "summary", b"".join(overflow), path=path)
+            notice = self._size_notice(len(overflow), path)
+            if budget is None or used + len(notice) <= budget:
+                out.append(notice)
+            issue_command(
+                "notice", {}, SIZE_NOTICE.format(count=len(overflow), path=path)
+            )
+        return b"".join(out)
+
+    def _close_page(self, sections: typing.List[bytes]) -> bytes:
+        self._pages += 1
+        label = self.wrap("summary", f"Page {self._pages + 1}")
+        prefix = f"<details>{label}{os.linesep}{os.linesep}".encode()
+        return prefix + b"".join(sections) + f"</details>{os.linesep}".encode()
+
+    def _size_notice(self, count: int, path: str) -> bytes:
+        message = SIZE_NOTICE.format(count=count, path=path)
+        element = self.renderer.wrap("p", self.renderer.text(message))
+        return f"{element}{os.linesep}".encode()
+
+    def _apply_limit(self, data: bytes, budget: int) -> bytes:
+        data = limits.apply_limit("STEP_SUMMARY", "summary", data, iter(()), budget)
+        limit = limits.get_limit("STEP_SUMMARY")
+        if data and limit and limit.policy == "spill":
+            message = f"Summary too large, written to {data.decode()}"
+            pointer = self.wrap("p", self.renderer.text(message))
+            data = f"{pointer}{os.linesep}".encode()
+        # The warning logged by `apply_limit` still has the path.
+        return data if len(data) <= budget else b""
+
+    def size_aware(
+        self, enabled: bool = True, page_bytes: typing.Optional[int] = None
+    ) -> Self:
+        """
+        Fits every write in the size limit of the summary file, see
+        `actions.core.limits`, instead of applying the limit policy.
+        Elements that do not fit are written to a file in RUNNER_TEMP, and a
+        notice pointing to it is added to the summary and to the log.
+        :param enabled: whether writes are size-aware
+        :param page_bytes: once the summary file holds this many bytes, the
+                           following elements are collapsed in details
+                           sections ("Page 2", "Page 3"...) of about this size
         :return: summary instance
         """
-        file_path = await self.file_path()
-        async with aiofiles.open(
-            file_path,
-            "w" if options.get("overwrite", False) else "a",
-        ) as f:
-            await f.write(self._buffer)
-        return self.empty_buffer()
+        self.size_aware_enabled = enabled
+        self.page_bytes = page_bytes
+        return self
+
+    def buffer_bytes(self) -> int:
+        """
+        Returns the number of UTF-8 bytes in the buffer, before secrets are
+        masked
+        """
+        return self._size
+
+    def file_bytes(self) -> int:
+        """
+        Returns the number of bytes in the summary file
+        """
+        file_path = self._find_file_path()
+        limits.track_file("STEP_SUMMARY", file_path, os.stat(file_path).st_size)
+        return limits.get_usage()["STEP_SUMMARY"]
+
+    def auto_flush(self, threshold: typing.Optional[int]) -> Self:
+        """
+        Appends the buffer to the summary file whenever it grows past a number
+        of characters, so large reports are written incrementally instead of
+        being held in memory. Content already flushed is lost if the summary
+        is later written with `overwrite`.
+        :param threshold: number of characters, None to disable
+        :return: summary instance
+        """
+        self.auto_flush_threshold = threshold
+        return self
 
     async def clear(self) -> Self:
         """
@@ -114,26 +398,39 @@ class Summary:
         """
         return await self.empty_buffer().write(overwrite=True)
 
+    def clear_sync(self) -> Self:
+        """
+        Same as `clear`, without an event loop
+        :return: summary instance
+        """
+        return self.empty_buffer().write_sync(overwrite=True)
+
     def stringify(self) -> str:
         """
         Returns the current summary buffer as a string
         :return: string of summary buffer
         """
-        return self._buffer
+        # The chunks are joined once, until more text is added.
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
 
     def is_empty_buffer(self) -> bool:
         """
         If the summary buffer is empty
         :return: true if the buffer is empty
         """
-        return len(self._buffer) == 0
+        return self._length == 0
 
     def empty_buffer(self) -> Self:
         """
         Resets the summary buffer without writing to summary file
         :return: summary instance
         """
-        self._buffer = ""
+        self._chunks = []
+        self._length = 0
+        self._size = 0
+        self._boundaries = []
         return self
 
     def add_raw(self, text: str, add_eol: bool = False) -> Self:
@@ -143,15 +440,75 @@ class Summary:
         :params add_eol: append an EOL to the raw text
         :return: summary instance
         """
-        self._buffer += text
-        return self.add_eol() if add_eol else self
+        with self._lock:
+            self._chunks.append(text)
+            self._length += len(text)
+            self._size += len(text) if text.isascii() else len(text.encode())
+            if add_eol:
+                return self.add_eol()
+
+            threshold = self.auto_flush_threshold
+            if threshold is not None and self._length >= threshold:
+                self.write_sync()
+            return self
 
     def add_eol(self) -> Self:
         """
         Adds the operating system-specific end-of-line marker to the buffer
         :return: summary instance
         """
-        return self.add_raw(os.linesep)
+        with self._lock:
+            self.add_raw(os.linesep)
+            # Size-aware writes only split the buffer after an element.
+            if self._length:
+                self._boundaries.append(self._length)
+            return self
+
+    def section(self) -> "SummarySection":
+        """
+        Starts a section: a separate buffer, filled with the same `add_*`
+        methods, that is added to this summary as a whole when committed.
+        Concurrent tasks and threads each fill their own section, so their
+        elements never interleave.
+
+        Sections are added in the order they were started, whatever order
+        they are committed in: a section committed early waits for the
+        sections started before it, and writing the summary meanwhile logs a
+        warning. Start sections before handing them out to tasks, e.g.
+        `sections = [summary.section() for _ in jobs]`, for an order that does
+        not depend on scheduling.
+        :return: summary section
+        """
+        with self._lock:
+            section = SummarySection(self)
+            self._pending_sections.append(section)
+            return section
+
+    def _commit_sections(self) -> None:
+        # Adds the finished sections at the head of the queue, in one append.
+        with self._lock:
+            ready = []
+            pending = self._pending_sections
+            while pending and pending[0].state != "open":
+                section = pending.pop(0)
+                if section.state == "committed":
+                    ready.append(section)
+            if not ready:
+                return
+
+            texts = []
+            offset = self._length
+            for section in ready:
+                texts.append(section.stringify())
+                self._boundaries.extend([b + offset for b in section._boundaries])
+                offset += section._length
+                self._size += section._size
+            self._chunks.append("".join(texts))
+            self._length = offset
+
+            threshold = self.auto_flush_threshold
+            if threshold is not None and self._length >= threshold:
+                self.write_sync()
 
     def add_code_block(self, code: str, lang: typing.Optional[str] = None) -> Self:
         """
@@ -160,8 +517,7 @@ class Summary:
         :params lang: language to syntax highlight code
         :return: summary instance
         """
-        attrs = {"lang": lang} if lang else {}
-        element = self.wrap("pre", self.wrap("code", code), attrs)
+        element = self.renderer.code_block(code, lang)
         return self.add_raw(element, add_eol=True)
 
     def add_list(self, items: typing.Sequence[str], ordered: bool = False) -> Self:
@@ -171,38 +527,71 @@ class Summary:
         :params ordered: if the rendered list should be ordered or not
         :return: summary instance
         """
-        tag = "ol" if ordered else "ul"
-        list_items = "".join([self.wrap("li", item) for item in items])
-        element = self.wrap(tag, list_items)
+        element = self.renderer.list(items, ordered)
         return self.add_raw(element, add_eol=True)
 
-    def add_table(self, rows: typing.Sequence[SummaryTableRow]) -> Self:
+    def compile_row(
+        self, shape: typing.Sequence[typing.Optional[SummaryTableCell]]
+    ) -> RowTemplate:
         """
-        Adds an HTML table to the summary buffer
-        :params rows: table rows
-        :return: summary instance
+        Compiles a row shape for `add_table`, for tables that repeat the same
+        shape many times. Tags and attributes are rendered once, rows only
+        fill in their values. Compile again after `set_renderer`.
+        :params shape: cells of the row, their `data` is ignored. None is a
+                       plain cell
+        :return: row template
         """
-        table_body = ""
-        for row in rows:
-            cells = ""
-            for cell in row:
-                if isinstance(cell, str):
-                    cells += self.wrap("td", cell)
-                    continue
-                tag = "th" if cell.get("header") else "td"
-                attrs = {
-                    "colspan": cell.get("colspan"),
-                    "rowspan": cell.get("rowspan"),
-                }
-                cells += self.wrap(
-                    tag,
-                    cell.get("data"),
-                    {k: v for k, v in attrs.items() if v is not None},
-                )
-            table_body += self.wrap("tr", cells)
+        return self.renderer.compile_row(shape)
 
-        element = self.wrap("table", table_body)
-        return self.add_raw(element, add_eol=True)
+    def add_table(
+        self,
+        rows: SummaryTableSource,
+        max_rows: typing.Optional[int] = None,
+        template: typing.Optional[RowTemplate] = None,
+    ) -> Self:
+        """
+        Adds an HTML table to the summary buffer.
+        Rows are read lazily and rendered in chunks straight into the buffer,
+        so with `auto_flush` large tables are never held in memory as a whole.
+        :params rows: table rows, any iterable of rows (e.g. a generator or a
+                      `csv.reader`), a `csv.DictReader`, a pyarrow Table or
+                      RecordBatch, or a NumPy array. Column names become a
+                      header row.
+        :params max_rows: maximum number of rows to render, not counting the
+                          header row built from column names. The other rows
+                          are replaced by a "N rows omitted" row
+        :params template: renders the rows after the first one, which are
+                          then rows of values, see `compile_row`
+        :return: summary instance
+        """
+        header, source_rows = _table_source(rows)
+        row_iter = iter(source_rows)
+        first_row = header or next(row_iter, None)
+        renderer = self.renderer
+        render_rows = template.render if template else renderer.table_rows
+        if first_row is None:
+            return self.add_raw(renderer.empty_table(), add_eol=True)
+
+        start = renderer.table_start(first_row)
+        # Rendered a chunk at a time, so cells are escaped in bulk.
+        chunk = []
+        count = 0 if header else 1
+        omitted = 0
+        for row in row_iter:
+            if max_rows is not None and count >= max_rows:
+                omitted = 1 + sum(1 for _ in row_iter)
+                break
+            chunk.append(row)
+            count += 1
+            if len(chunk) >= TABLE_CHUNK_ROWS:
+                self.add_raw(start + render_rows(chunk))
+                start, chunk = "", []
+
+        rendered = [start, render_rows(chunk)]
+        if omitted:
+            rendered.append(renderer.table_omitted_rows(omitted, len(first_row)))
+        rendered.append(renderer.table_end())
+        return self.add_raw("".join(rendered), add_eol=True)
 
     def add_details(self, label: str, content: str) -> Self:
         """
@@ -211,7 +600,7 @@ class Summary:
         :params content: collapsable content
         :return: summary instance
         """
-        element = self.wrap("details", self.wrap("summary", label) + content)
+        element = self.renderer.details(label, content)
         return self.add_raw(element, add_eol=True)
 
     def add_image(
@@ -224,7 +613,7 @@ class Summary:
         :params options: addition image attributes
         :return: summary instance
         """
-        element = self.wrap("img", None, {"src": src, "alt": alt, **options})
+        element = self.renderer.image(src, alt, options)
         return self.add_raw(element, add_eol=True)
 
     def add_heading(self, text: str, level: typing.Union[int, float, str] = 1) -> Self:
@@ -234,9 +623,7 @@ class Summary:
         :params level: the heading level
         :return: summary instance
         """
-        tag = f"h{level}"
-        allowed_tag = tag if tag in {"h1", "h2", "h3", "h4", "h5", "h6"} else "h1"
-        element = self.wrap(allowed_tag, text)
+        element = self.renderer.heading(text, level)
         return self.add_raw(element, add_eol=True)
 
     def add_separator(self) -> Self:
@@ -244,7 +631,7 @@ class Summary:
         Adds an HTML thematic break (<hr>) to the summary buffer
         :return: summary instance
         """
-        element = self.wrap("hr", None)
+        element = self.renderer.separator()
         return self.add_raw(element, add_eol=True)
 
     def add_break(self) -> Self:
@@ -252,7 +639,7 @@ class Summary:
         Adds an HTML line break (<br>) to the summary buffer
         :return: summary instance
         """
-        element = self.wrap("br", None)
+        element = self.renderer.line_break()
         return self.add_raw(element, add_eol=True)
 
     def add_quote(self, text: str, cite: typing.Optional[str] = None) -> Self:
@@ -262,8 +649,7 @@ class Summary:
         :params cite: citation url
         :return: summary instance
         """
-        attrs = {"cite": cite} if cite else {}
-        element = self.wrap("blockquote", text, attrs)
+        element = self.renderer.quote(text, cite)
         return self.add_raw(element, add_eol=True)
 
     def add_link(self, text: str, href: str) -> Self:
@@ -273,8 +659,64 @@ class Summary:
         :params href: hyperlink
         :return: summary instance
         """
-        element = self.wrap("a", text, {"href": href})
+        element = self.renderer.link(text, href)
         return self.add_raw(element, add_eol=True)
 
 
+class SummarySection(Summary):
+    """
+    A section of a summary, see `Summary.section`. Commit it (or use it as a
+    context manager) to add it to the summary, sections are never written to
+    the summary file directly.
+    """
+
+    # open, committed or discarded
+    state: typing.Literal["open", "committed", "discarded"]
+
+    def __init__(self, parent: Summary) -> None:
+        super().__init__()
+        self.renderer = parent.renderer
+        self.state = "open"
+        self._parent = parent
+
+    def commit(self) -> Summary:
+        """
+        Adds the section to the summary, once the sections started before it
+        are committed or discarded
+        :return: summary the section belongs to
+        """
+        self._close("committed")
+        return self._parent
+
+    def discard(self) -> Summary:
+        """
+        Drops the section, the sections started after it no longer wait
+        for it
+        :return: summary the section belongs to
+        """
+        self._close("discarded")
+        return self._parent
+
+    def write_sync(self, **options: Unpack[SummaryWriteOptions]) -> Self:
+        raise RuntimeError("Summary sections are not written, use commit() instead")
+
+    def auto_flush(self, threshold: typing.Optional[int]) -> Self:
+        if threshold is not None:
+            raise RuntimeError("Summary sections are not flushed, use commit() instead")
+        return super().auto_flush(threshold)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.state == "open":
+            self._close("discarded" if exc_type else "committed")
+
+    def _close(self, state: typing.Literal["committed", "discarded"]) -> None:
+        if self.state != "open":
+            raise Exception(f"Summary section already {self.state}")
+        self.state = state
+        self._parent._commit_sections()
+
+
 summary = Summary()
@@ -0,0 +1,386 @@
+import html
+import os
+import re
+import typing
+import urllib.parse
+
+from actions.core.command import Escaper
+
+if typing.TYPE_CHECKING:
+    from actions.core.summary import SummaryTableCell, SummaryTableRow
+
+
+# "&" goes first, the other replacements add ampersands.
+_escape_html = Escaper(
+    (
+        ("&", "&amp;"),
+        ("<", "&lt;"),
+        (">", "&gt;"),
+        ('"', "&quot;"),
+        ("'", "&#x27;"),
+    )
+)
+
+
+class Raw(str):
+    """
+    Text that is already HTML (or Markdown), added to the summary as is.
+    Every other text and attribute value is escaped by the renderers, e.g.
+    `summary.add_details("Logs", Raw("<pre>...</pre>"))`.
+    """
+
+
+def escape_all(values: typing.Sequence[str]) -> typing.List[str]:
+    """
+    Escapes HTML special characters in many values at once, like `html.escape`,
+    which is much faster than escaping each value of a large table, see
+    `Escaper.many`. `Raw` values are kept as is.
+    :param values: values to escape
+    :return: escaped values, in the same order
+    """
+    if not any(issubclass(kind, Raw) for kind in set(map(type, values))):
+        return _escape_html.many(values)
+
+    escaped = iter(_escape_html.many(v for v in values if not isinstance(v, Raw)))
+    return [value if isinstance(value, Raw) else next(escaped) for value in values]
+
+
+class HtmlRenderer:
+    """
+    Renders summary elements as HTML. This is the default renderer.
+    Subclasses override the methods of the elements they render differently.
+
+    Text and attribute values are escaped, except `Raw` values.
+    `escape=False` turns escaping off for every value.
+    """
+
+    def __init__(self, escape: bool = True) -> None:
+        self.escape = escape
+
+    def wrap(
+        self,
+        tag: str,
+        content: typing.Optional[str],
+        attrs: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> str:
+        """
+        Wraps content in an HTML tag, adding any HTML attributes. The content
+        is markup and is not escaped, attribute values are.
+        :param tag: HTML tag to wrap
+        :param content: content within the tag
+        :param attrs: key-value list of HTML attributes to add
+        :return: content wrapped in HTML element
+        """
+        html_attrs = self._attrs(attrs)
+        if not content:
+            return f"<{tag}{html_attrs}>"
+
+        return f"<{tag}{html_attrs}>{content}</{tag}>"
+
+    def text(self, value: str) -> str:
+        """
+        Escapes a text value, unless it is `Raw` or escaping is off
+        """
+        if not self.escape or isinstance(value, Raw):
+            return value
+        return html.escape(value)
+
+    def texts(self, values: typing.Sequence[str]) -> typing.List[str]:
+        """
+        Same as `text`, for many values at once, see `escape_all`
+        """
+        return escape_all(values) if self.escape else list(values)
+
+    def code_block(self, code: str, lang: typing.Optional[str]) -> str:
+        attrs = {"lang": lang} if lang else {}
+        return self.wrap("pre", self.wrap("code", self.text(code)), attrs)
+
+    def list(self, items: typing.Iterable[str], ordered: bool) -> str:
+        tag = "ol" if ordered else "ul"
+        texts = self.texts(list(items))
+        return self.wrap(tag, "".join([self.wrap("li", item) for item in texts]))
+
+    def table_start(self, first_row: "SummaryTableRow") -> str:
+        """
+        Renders the start of a table, up to and including its first row
+        """
+        return self.wrap("table", None) + self.table_row(first_row)
+
+    def table_row(self, row: "SummaryTableRow") -> str:
+        return self.table_rows([row])
+
+    def table_rows(self, rows: typing.Sequence["SummaryTableRow"]) -> str:
+        """
+        Renders many rows, escaping the text of all their cells at once
+        """
+        texts = self._cell_texts(rows)
+        return "".join([self._table_row(row, texts) for row in rows])
+
+    def compile_row(
+        self, shape: typing.Sequence[typing.Optional["SummaryTableCell"]]
+    ) -> "RowTemplate":
+        """
+        Compiles a row shape into a template, see `RowTemplate`
+        """
+        return RowTemplate(self, shape)
+
+    def _template_texts(self, values: typing.Sequence[str]) -> typing.List[str]:
+        # Converts the cell values of rows rendered with a `RowTemplate`.
+        return self.texts(values)
+
+    def _cell_texts(
+        self, rows: typing.Sequence["SummaryTableRow"]
+    ) -> typing.Iterator[str]:
+        values = [
+            _cell_text(cell.get("data") if isinstance(cell, dict) else cell)
+            for row in rows
+            for cell in row
+        ]
+        return iter(self.texts(values))
+
+    def _table_row(self, row: "SummaryTableRow", texts: typing.Iterator[str]) -> str:
+        cells = []
+        for cell in row:
+            text = next(texts)
+            if not isinstance(cell, dict):
+                cells.append(self.wrap("td", text))
+                continue
+            tag = "th" if cell.get("header") else "td"
+            attrs = {
+                "colspan": cell.get("colspan"),
+                "rowspan": cell.get("rowspan"),
+            }
+            cells.append(
+                self.wrap(
+                    tag,
+                    text,
+                    {k: v for k, v in attrs.items() if v is not None},
+                )
+            )
+        return self.wrap("tr", "".join(cells))
+
+    def table_omitted_rows(self, omitted: int, columns: int) -> str:
+        text = f"{omitted} row omitted" if omitted == 1 else f"{omitted} rows omitted"
+        cell = self.wrap("em", text)
+        return self.wrap("tr", self.wrap("td", cell, {"colspan": str(columns)}))
+
+    def table_end(self) -> str:
+        return "</table>"
+
+    def empty_table(self) -> str:
+        return self.wrap("table", None)
+
+    def details(self, label: str, content: str) -> str:
+        label, content = self.texts([label, content])
+        return self.wrap("details", self.wrap("summary", label) + content)
+
+    def image(self, src: str, alt: str, options: typing.Mapping[str, str]) -> str:
+        return self.wrap("img", None, {"src": src, "alt": alt, **options})
+
+    def heading(self, text: str, level: typing.Union[int, float, str]) -> str:
+        tag = f"h{level}"
+        allowed_tag = tag if tag in {"h1", "h2", "h3", "h4", "h5", "h6"} else "h1"
+        return self.wrap(allowed_tag, self.text(text))
+
+    def separator(self) -> str:
+        return self.wrap("hr", None)
+
+    def line_break(self) -> str:
+        return self.wrap("br", None)
+
+    def quote(self, text: str, cite: typing.Optional[str]) -> str:
+        attrs = {"cite": cite} if cite else {}
+        return self.wrap("blockquote", self.text(text), attrs)
+
+    def link(self, text: str, href: str) -> str:
+        return self.wrap("a", self.text(text), {"href": href})
+
+    def _attrs(self, attrs: typing.Optional[typing.Dict[str, str]]) -> str:
+        if not attrs:
+            return ""
+        values = self.texts([str(value) for value in attrs.values()])
+        return "".join([f' {key}="{value}"' for key, value in zip(attrs, values)])
+
+
+class RowTemplate:
+    """
+    A row shape compiled once into a format string, for tables that repeat
+    the same shape many times. The tags and attributes of the row are
+    rendered at compile time, so rendering rows only escapes their values,
+    in bulk, and fills them in with a single `str.format` call.
+
+    A template is compiled for one renderer, see `Summary.compile_row`.
+    """
+
+    columns: int
+
+    def __init__(
+        self,
+        renderer: HtmlRenderer,
+        shape: typing.Sequence[typing.Optional["SummaryTableCell"]],
+    ) -> None:
+        self.columns = len(shape)
+        self._renderer = renderer
+        # The separator is never escaped, it marks where values go.
+        row = [
+            {**cell, "data": Raw(Escaper.SEPARATOR)} if cell else Raw(Escaper.SEPARATOR)
+            for cell in shape
+        ]
+        parts = renderer.table_row(row).split(Escaper.SEPARATOR)
+        self._format = "{}".join(
+            [part.replace("{", "{{").replace("}", "}}") for part in parts]
+        )
+
+    def render(self, rows: typing.Iterable[typing.Sequence[typing.Any]]) -> str:
+        """
+        Renders rows of values, one value per cell of the shape
+        :param rows: rows of values, None renders an empty cell
+        :return: rendered rows
+        """
+        rows = rows if isinstance(rows, list) else list(rows)
+        values = [
+            value if isinstance(value, str) else _cell_text(value)
+            for row in rows
+            for value in row
+        ]
+        if len(values) != self.columns * len(rows):
+            raise Exception(f"Every row must have {self.columns} cells")
+
+        texts = self._renderer._template_texts(values)
+        return (self._format * len(rows)).format(*texts)
+
+
+def _cell_text(value: typing.Any) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+class MinifiedHtmlRenderer(HtmlRenderer):
+    """
+    Renders summary elements as HTML without the end tags HTML makes optional
+    (`</li>`, `</tr>`, `</th>` and `</td>`), which are most of the markup of
+    large tables and lists.
+    """
+
+    OPTIONAL_END_TAGS: typing.ClassVar[typing.FrozenSet[str]] = frozenset(
+        {"li", "tr", "th", "td"}
+    )
+
+    def wrap(
+        self,
+        tag: str,
+        content: typing.Optional[str],
+        attrs: typing.Optional[typing.Dict[str, str]] = None,
+    ) -> str:
+        if tag not in self.OPTIONAL_END_TAGS:
+            return super().wrap(tag, content, attrs)
+
+        return f"<{tag}{self._attrs(attrs)}>{content or ''}"
+
+
+# Characters kept as is in link and image URLs: the reserved characters,
+# except the parentheses that end the URL, and escape sequences.
+_URL_SAFE = ":/?#[]@!$&'*+,;=%~"
+
+
+class MarkdownRenderer(HtmlRenderer):
+    """
+    Renders summary elements as GitHub Flavored Markdown where it has an
+    equivalent: headings, lists, tables, code blocks, quotes, links, images
+    and separators. Details and line breaks stay HTML.
+
+    Every block is followed by an empty line, so blocks never merge. The first
+    row of a table is its header row, GFM tables always have one. `colspan`
+    cells are padded with empty cells and `rowspan` is ignored.
+    """
+
+    def code_block(self, code: str, lang: typing.Optional[str]) -> str:
+        # The fence has to be longer than any backtick run in the code, which
+        # is shown as is and never escaped.
+        longest = max((len(run) for run in re.findall("`+", code)), default=0)
+        fence = "`" * max(3, longest + 1)
+        return self._block(f"{fence}{lang or ''}{os.linesep}{code}{os.linesep}{fence}")
+
+    def list(self, items: typing.Iterable[str], ordered: bool) -> str:
+        lines = [
+            f"{f'{i}.' if ordered else '-'} {self._inline(item)}"
+            for i, item in enumerate(self.texts(list(items)), 1)
+        ]
+        return self._block(os.linesep.join(lines))
+
+    def table_start(self, first_row: "SummaryTableRow") -> str:
+        # The header row is followed by the delimiter row.
+        cells = self._table_cells(first_row, self._cell_texts([first_row]))
+        return f"|{'|'.join(cells)}|{os.linesep}|{'-|' * len(cells)}{os.linesep}"
+
+    def table_omitted_rows(self, omitted: int, columns: int) -> str:
+        text = f"{omitted} row omitted" if omitted == 1 else f"{omitted} rows omitted"
+        return self.table_row([f"*{text}*"] + [""] * (columns - 1))
+
+    def table_end(self) -> str:
+        return ""
+
+    def empty_table(self) -> str:
+        return ""
+
+    def image(self, src: str, alt: str, options: typing.Mapping[str, str]) -> str:
+        # Markdown images have no size.
+        if options:
+            return super().image(src, alt, options)
+        alt, src = self.texts([alt, src])
+        return self._block(f"![{self._label(alt)}]({self._url(src)})")
+
+    def heading(self, text: str, level: typing.Union[int, float, str]) -> str:
+        depth = int(level) if str(level) in {"1", "2", "3", "4", "5", "6"} else 1
+        return self._block(f"{'#' * depth} {self._inline(self.text(text))}")
+
+    def separator(self) -> str:
+        return self._block("---")
+
+    def quote(self, text: str, cite: typing.Optional[str]) -> str:
+        lines = self.text(text).splitlines()
+        return self._block(os.linesep.join(f"> {line}" for line in lines))
+
+    def link(self, text: str, href: str) -> str:
+        text, href = self.texts([text, href])
+        return f"[{self._label(text)}]({self._url(href)})"
+
+    def _template_texts(self, values: typing.Sequence[str]) -> typing.List[str]:
+        texts = self.texts(values)
+        joined = Escaper.SEPARATOR.join(texts)
+        if "|" in joined or "\n" in joined or "\r" in joined:
+            return [self._inline(text).replace("|", "\\|") for text in texts]
+        return texts
+
+    def _table_row(self, row: "SummaryTableRow", texts: typing.Iterator[str]) -> str:
+        return f"|{'|'.join(self._table_cells(row, texts))}|{os.linesep}"
+
+    def _table_cells(
+        self, row: "SummaryTableRow", texts: typing.Iterator[str]
+    ) -> typing.List[str]:
+        cells = []
+        for cell in row:
+            cells.append(self._inline(next(texts)).replace("|", "\\|"))
+            if isinstance(cell, dict):
+                cells.extend([""] * (int(cell.get("colspan") or 1) - 1))
+        return cells
+
+    def _label(self, text: str) -> str:
+        # Brackets would end the text of a link or image early.
+        if not self.escape or isinstance(text, Raw):
+            return text
+        return re.sub(r"[\\\[\]]", r"\\\g<0>", self._inline(text))
+
+    def _url(self, url: str) -> str:
+        if not self.escape or isinstance(url, Raw):
+            return url
+        return urllib.parse.quote(url, safe=_URL_SAFE)
+
+    @staticmethod
+    def _inline(text: str) -> str:
+        return "<br>".join(text.splitlines()) if "\n" in text or "\r" in text else text
+
+    @staticmethod
+    def _block(text: str) -> str:
+        return f"{text}{os.linesep}"
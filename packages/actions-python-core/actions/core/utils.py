@@ -21,7 +21,7 @@ def to_command_value(input_value: typing.Any) -> str:
 
 
 def to_command_properties(
-    annotation_properties: "AnnotationProperties"
+    annotation_properties: "AnnotationProperties",
 ) -> "CommandProperties":
     if len(annotation_properties) == 0:
         return {}
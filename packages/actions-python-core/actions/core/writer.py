@@ -0,0 +1,246 @@
+import abc
+import atexit
+import contextlib
+import sys
+import threading
+import time
+import typing
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class Writer(abc.ABC):
+    """
+    Destination for the lines emitted by the toolkit (workflow commands and log
+    output).
+
+    Every call to `write` receives one or more complete lines, so a writer never
+    has to deal with partial commands.
+    """
+
+    @abc.abstractmethod
+    def write(self, text: str) -> None:
+        pass
+
+    def write_bytes(self, data: typing.Union[bytes, memoryview]) -> None:
+        """
+        Writes raw output, e.g. a chunk of a child process' output. Unlike
+        `write`, the data does not have to end at a line boundary.
+        """
+        self.write(bytes(data).decode("utf-8", errors="replace"))
+
+    def flush(self) -> None:  # noqa: B027
+        """
+        Writes out buffered lines, unbuffered writers have nothing to do
+        """
+
+
+class StreamWriter(Writer):
+    """
+    Unbuffered writer, every line is forwarded to the stream right away.
+    This is the default writer.
+
+    Writes are serialized with a lock, so lines written from several threads
+    never interleave.
+    """
+
+    _stream: typing.Optional[typing.TextIO]
+    _lock: threading.Lock
+
+    def __init__(self, stream: typing.Optional[typing.TextIO] = None) -> None:
+        """
+        :param stream: stream to write to, defaults to the current `sys.stdout`
+        """
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    @property
+    def stream(self) -> typing.TextIO:
+        return self._stream or sys.stdout
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            self.stream.write(text)
+
+    def write_bytes(self, data: typing.Union[bytes, memoryview]) -> None:
+        with self._lock:
+            stream = self.stream
+            buffer = getattr(stream, "buffer", None)
+            if buffer is None:
+                stream.write(bytes(data).decode("utf-8", errors="replace"))
+                return
+            # Text still sitting in the text layer has to go out first.
+            stream.flush()
+            buffer.write(data)
+            buffer.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self.stream.flush()
+
+
+class _ThreadBuffer:
+    __slots__ = ("chunks", "lock", "owner", "size")
+
+    def __init__(self) -> None:
+        self.chunks: typing.List[str] = []
+        self.lock = threading.Lock()
+        self.owner = threading.current_thread()
+        self.size = 0
+
+
+class BufferedWriter(StreamWriter):
+    """
+    Writer that collects lines in memory and hands them to the stream in a
+    single write.
+
+    Each thread appends to its own buffer, which is committed to the stream
+    in one locked write once it grows past `max_size` characters. All buffers
+    are flushed at most `flush_interval` seconds after a line was written (by
+    a background timer when nothing else is written), at `end_group` and at
+    interpreter exit. Lines are only ever appended whole, so a flush never
+    splits a command across two writes.
+    """
+
+    max_size: int
+    flush_interval: float
+    _local: threading.local
+    _buffers: typing.List[_ThreadBuffer]
+    _buffers_lock: threading.Lock
+    _last_flush: float
+    _timer: typing.Optional[threading.Timer]
+
+    def __init__(
+        self,
+        stream: typing.Optional[typing.TextIO] = None,
+        max_size: int = DEFAULT_BUFFER_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ) -> None:
+        """
+        :param stream: stream to write to, defaults to the current `sys.stdout`
+        :param max_size: number of buffered characters that triggers a flush
+        :param flush_interval: maximum number of seconds lines stay buffered
+        """
+        super().__init__(stream)
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._buffers = []
+        self._buffers_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    def write(self, text: str) -> None:
+        buffer = self._thread_buffer()
+        with buffer.lock:
+            buffer.chunks.append(text)
+            buffer.size += len(text)
+            full = buffer.size >= self.max_size
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        elif full:
+            self._commit(buffer)
+        else:
+            self._schedule_flush()
+
+    def write_bytes(self, data: typing.Union[bytes, memoryview]) -> None:
+        self.flush()
+        super().write_bytes(data)
+
+    def flush(self) -> None:
+        with self._buffers_lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            self._commit(buffer)
+
+        with self._buffers_lock:
+            self._buffers = [b for b in self._buffers if b.chunks or b.owner.is_alive()]
+        super().flush()
+        self._last_flush = time.monotonic()
+
+    def _schedule_flush(self) -> None:
+        # Flushes the lines in the buffers even if nothing else is written,
+        # e.g. before a long blocking call.
+        with self._buffers_lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self) -> None:
+        with self._buffers_lock:
+            self._timer = None
+        self.flush()
+
+    def _thread_buffer(self) -> _ThreadBuffer:
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = _ThreadBuffer()
+            with self._buffers_lock:
+                self._buffers.append(buffer)
+            return buffer
+
+    def _commit(self, buffer: _ThreadBuffer) -> None:
+        # The buffer lock is held until the stream write is done, so lines of
+        # one thread keep their order even when another thread flushes them.
+        with buffer.lock:
+            if not buffer.chunks:
+                return
+            text = "".join(buffer.chunks)
+            buffer.chunks, buffer.size = [], 0
+            with self._lock:
+                self.stream.write(text)
+
+
+_writer: Writer = StreamWriter()
+
+
+def get_writer() -> Writer:
+    """
+    Gets the writer used for workflow commands and log output
+    """
+    return _writer
+
+
+def set_writer(writer: Writer) -> Writer:
+    """
+    Replaces the writer used for workflow commands and log output.
+    Anything buffered by the previous writer is flushed first.
+    :param writer: the new writer
+    :return: the previous writer
+    """
+    global _writer
+
+    previous = _writer
+    previous.flush()
+    _writer = writer
+    return previous
+
+
+@contextlib.contextmanager
+def buffered_output(
+    max_size: int = DEFAULT_BUFFER_SIZE,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+) -> typing.Iterator[BufferedWriter]:
+    """
+    Buffers workflow commands and log output within the block.
+    Output written directly to `sys.stdout` (e.g. `print`) is not buffered and
+    may appear before buffered lines.
+    :param max_size: number of buffered characters that triggers a flush
+    :param flush_interval: maximum number of seconds lines stay buffered
+    """
+    writer = BufferedWriter(max_size=max_size, flush_interval=flush_interval)
+    previous = set_writer(writer)
+    try:
+        yield writer
+    finally:
+        set_writer(previous)
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    _writer.flush()
@@ -0,0 +1,64 @@
+"""
+Time and peak memory to read a large JUnit report: loading the whole tree
+with `ElementTree.parse`, and the incremental `parse_junit`.
+
+    python benchmarks/bench_junit.py
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+import typing
+from xml.etree import ElementTree
+
+from actions.core.junit import parse_junit
+
+CASES = 200_000
+
+
+def write_report(path: str) -> None:
+    with open(path, "w") as f:
+        f.write('<testsuites><testsuite name="unit">')
+        for i in range(CASES):
+            f.write(f'<testcase classname="tests.test_{i % 100}" name="test_{i}"')
+            if i % 1000:
+                f.write(f' time="{i % 97 / 1000}"/>')
+            else:
+                f.write(' time="1.5"><failure message="assert False">')
+                f.write("Traceback" * 50)
+                f.write("</failure><system-out>")
+                f.write("output " * 200)
+                f.write("</system-out></testcase>")
+        f.write("</testsuite></testsuites>")
+
+
+def load_tree(path: str) -> None:
+    root = ElementTree.parse(path).getroot()
+    sum(1 for _ in root.iter("testcase"))
+
+
+def measure(name: str, func: typing.Callable[[], typing.Any]) -> None:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+
+    # Timed separately, tracing allocations slows everything down.
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<20} {elapsed * 1000:8.1f} ms, peak {peak / 1024 / 1024:6.1f} MiB")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "report.xml")
+        write_report(path)
+        print(f"report: {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+        measure("ElementTree.parse", lambda: load_tree(path))
+        measure("parse_junit", lambda: parse_junit(path))
+
+
+if __name__ == "__main__":
+    main()
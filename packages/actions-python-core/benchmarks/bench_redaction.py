@@ -0,0 +1,65 @@
+"""
+Time to redact a multi-MB log with a growing number of registered secrets,
+then with 1000 secrets of which the shortest gets shorter. Past
+PREFILTER_MIN_SECRETS the throughput depends on the shortest secret rather
+than on the number of secrets.
+
+    python benchmarks/bench_redaction.py
+"""
+
+import random
+import secrets
+import string
+import time
+import typing
+
+from actions.core.redaction import Redactor
+
+TEXT_SIZE = 4 * 1024 * 1024
+SECRET_COUNTS = (1, 10, 100, 1_000, 5_000)
+SHORTEST_LENGTHS = (16, 8, 4)
+# A secret occurs in the log every this many characters.
+OCCURRENCE_INTERVAL = 64 * 1024
+
+
+def run(label: str, values: typing.List[str], text: str) -> None:
+    redactor = Redactor()
+    for value in values:
+        redactor.add(value)
+    # Some of the secrets occur in the log.
+    chunks = [
+        text[i : i + OCCURRENCE_INTERVAL] + values[i % len(values)]
+        for i in range(0, len(text), OCCURRENCE_INTERVAL)
+    ]
+    text = "".join(chunks)
+
+    started = time.perf_counter()
+    redactor.redact("")
+    compiled = time.perf_counter() - started
+
+    started = time.perf_counter()
+    redactor.redact(text)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:>22}: compile {compiled * 1000:8.1f} ms, "
+        f"{len(text) / elapsed / 1024 / 1024:6.1f} MB/s"
+    )
+
+
+def main() -> None:
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + string.digits + " :/-_\n"
+    text = "".join(rng.choices(alphabet, k=TEXT_SIZE))
+
+    for count in SECRET_COUNTS:
+        values = [secrets.token_urlsafe(24) for _ in range(count)]
+        run(f"{count} secrets", values, text)
+
+    for length in SHORTEST_LENGTHS:
+        values = [secrets.token_urlsafe(24) for _ in range(999)]
+        values.append(secrets.token_urlsafe(24)[:length])
+        run(f"1000, shortest {length}", values, text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Time to build a 100k-row summary report, with the chunk-list buffer and with
+the previous string-concatenation buffer.
+
+    python benchmarks/bench_summary.py
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+import typing
+
+from actions.core import limits
+from actions.core._compat import Self
+from actions.core.summary import SUMMARY_ENV_VAR, Summary
+
+ROWS = 100_000
+
+
+class ConcatSummary(Summary):
+    # The previous buffer: one string, grown with `+=`.
+    _buffer: str = ""
+
+    def add_raw(self, text: str, add_eol: bool = False) -> Self:
+        self._buffer += text
+        return self.add_eol() if add_eol else self
+
+    def stringify(self) -> str:
+        return self._buffer
+
+
+def build_rows(summary: Summary) -> None:
+    for i in range(ROWS):
+        summary.add_raw(f"<tr><td>test_{i}</td><td>passed</td><td>{i % 97}ms</td></tr>")
+    summary.stringify()
+
+
+def build_table(summary: Summary) -> None:
+    rows = [[f"test_{i}", "passed", f"{i % 97}ms"] for i in range(ROWS)]
+    summary.add_table(rows)
+    summary.stringify()
+
+
+def measure(name: str, func: typing.Callable[[], None]) -> None:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+
+    # Timed separately, tracing allocations slows everything down.
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<32} {elapsed * 1000:8.1f} ms, peak {peak / 1024 / 1024:6.1f} MiB")
+
+
+def main() -> None:
+    measure("add_raw x100k, str +=", lambda: build_rows(ConcatSummary()))
+    measure("add_raw x100k, chunk list", lambda: build_rows(Summary()))
+    measure("add_table 100k, str +=", lambda: build_table(ConcatSummary()))
+    measure("add_table 100k, chunk list", lambda: build_table(Summary()))
+
+    # The report is larger than the step summary limit.
+    limits.set_limit("STEP_SUMMARY", None)
+    with tempfile.NamedTemporaryFile() as f:
+        os.environ[SUMMARY_ENV_VAR] = f.name
+        measure(
+            "add_raw x100k, auto flush 256k",
+            lambda: build_rows(Summary().auto_flush(256 * 1024)),
+        )
+
+
+if __name__ == "__main__":
+    main()
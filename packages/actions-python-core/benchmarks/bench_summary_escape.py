@@ -0,0 +1,62 @@
+"""
+Time to render a 100k-cell table of untrusted text: every cell escaped with
+`html.escape` before `add_table`, and the bulk escaping of `add_table`.
+
+    python benchmarks/bench_summary_escape.py
+"""
+
+import html
+import time
+import typing
+
+from actions.core.summary import Summary
+from actions.core.summary_renderers import HtmlRenderer, escape_all
+
+ROWS = 25_000
+TABLE = [
+    [f"tests/test_{i}.py::test_<case {i}>", "failed", f"{i % 97}ms", "a & b"]
+    for i in range(ROWS)
+]
+
+
+def per_cell() -> str:
+    # The previous workaround: escape each cell, render without escaping.
+    summary = Summary().set_renderer(HtmlRenderer(escape=False))
+    summary.add_table([[html.escape(cell) for cell in row] for row in TABLE])
+    return summary.stringify()
+
+
+def bulk() -> str:
+    summary = Summary()
+    summary.add_table(TABLE)
+    return summary.stringify()
+
+
+def escape_per_cell() -> typing.List[str]:
+    return [html.escape(cell) for row in TABLE for cell in row]
+
+
+def escape_bulk() -> typing.List[str]:
+    return escape_all([cell for row in TABLE for cell in row])
+
+
+def measure(name: str, func: typing.Callable[[], typing.Any]) -> typing.Any:
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"{name:<24} {best * 1000:8.1f} ms")
+    return result
+
+
+def main() -> None:
+    expected = measure("escape: per cell", escape_per_cell)
+    assert measure("escape: escape_all", escape_bulk) == expected
+
+    expected = measure("add_table: per cell", per_cell)
+    assert measure("add_table: bulk", bulk) == expected
+
+
+if __name__ == "__main__":
+    main()
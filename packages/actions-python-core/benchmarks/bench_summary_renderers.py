@@ -0,0 +1,61 @@
+"""
+Size of a test report rendered by each summary renderer, and how many table
+rows fit in the 1 MiB step summary limit.
+
+    python benchmarks/bench_summary_renderers.py
+"""
+
+import time
+
+from actions.core.limits import DEFAULT_LIMITS
+from actions.core.summary import Summary
+from actions.core.summary_renderers import (
+    HtmlRenderer,
+    MarkdownRenderer,
+    MinifiedHtmlRenderer,
+)
+
+ROWS = 10_000
+RENDERERS = {
+    "html": HtmlRenderer(),
+    "minified html": MinifiedHtmlRenderer(),
+    "markdown": MarkdownRenderer(),
+}
+
+
+def build(summary: Summary) -> None:
+    summary.add_heading("Test results")
+    summary.add_list([f"{ROWS} tests", "0 failures", "12.3s"])
+    summary.add_heading("Slowest tests", 2)
+    header = [
+        {"data": "test", "header": True},
+        {"data": "result", "header": True},
+        {"data": "duration", "header": True},
+    ]
+    rows = (
+        [f"tests.test_module.test_{i}", "passed", f"{i % 97}ms"] for i in range(ROWS)
+    )
+    summary.add_table([header, *rows])
+
+
+def main() -> None:
+    limit = DEFAULT_LIMITS["STEP_SUMMARY"].max_bytes
+    baseline = None
+    for name, renderer in RENDERERS.items():
+        summary = Summary().set_renderer(renderer)
+        started = time.perf_counter()
+        build(summary)
+        size = len(summary.stringify().encode())
+        elapsed = time.perf_counter() - started
+
+        baseline = baseline or size
+        saved = 1 - size / baseline
+        fit = int(ROWS * limit / size)
+        print(
+            f"{name:<14} {size / 1024:8.1f} KiB, {saved:6.1%} saved, "
+            f"~{fit} rows per MiB, {elapsed * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
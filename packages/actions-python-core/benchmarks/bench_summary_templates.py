@@ -0,0 +1,57 @@
+"""
+Time to render a 100k-row test report table, row by row through the
+renderer and with a precompiled row template.
+
+    python benchmarks/bench_summary_templates.py
+"""
+
+import time
+import typing
+
+from actions.core.summary import Summary
+
+ROWS = 100_000
+HEADER = [
+    {"data": "test", "header": True},
+    {"data": "result", "header": True},
+    {"data": "duration", "header": True},
+]
+
+
+def rows() -> typing.List[typing.List[typing.Any]]:
+    return [[f"tests.test_module.test_{i}", "passed", i % 97] for i in range(ROWS)]
+
+
+def per_row(table: typing.List[typing.List[typing.Any]]) -> str:
+    summary = Summary()
+    summary.add_table([HEADER, *table])
+    return summary.stringify()
+
+
+def template(table: typing.List[typing.List[typing.Any]]) -> str:
+    summary = Summary()
+    row = summary.compile_row([{"header": True}, None, None])
+    summary.add_table([HEADER, *table], template=row)
+    return summary.stringify()
+
+
+def measure(
+    name: str, func: typing.Callable[[typing.List[typing.List[typing.Any]]], str]
+) -> str:
+    table = rows()
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        result = func(table)
+        best = min(best, time.perf_counter() - started)
+    print(f"{name:<16} {best * 1000:8.1f} ms, {len(result) / 1024:8.1f} KiB")
+    return result
+
+
+def main() -> None:
+    measure("table_row", per_row)
+    measure("row template", template)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Latency of appending a small section to the step summary: the previous
+aiofiles implementation, the executor-backed `write` and `write_sync`.
+
+    python benchmarks/bench_summary_write.py
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import typing
+
+import aiofiles
+import aiofiles.os
+
+from actions.core import limits
+from actions.core.summary import SUMMARY_ENV_VAR, Summary
+
+WRITES = 2_000
+SECTION = "<tr><td>test_example</td><td>passed</td><td>12ms</td></tr>" * 16
+
+
+async def write_aiofiles(summary: Summary) -> None:
+    # The previous implementation: an access check, an open and a write, each
+    # dispatched to the thread pool.
+    path = os.environ[SUMMARY_ENV_VAR]
+    await aiofiles.os.access(path, os.R_OK | os.W_OK)
+    async with aiofiles.open(path, "a") as f:
+        await f.write(summary.stringify())
+    summary.empty_buffer()
+
+
+async def write_executor(summary: Summary) -> None:
+    await summary.write()
+
+
+async def write_sync(summary: Summary) -> None:
+    summary.write_sync()
+
+
+def report(name: str, latencies: typing.List[float]) -> None:
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(f"{name:<24} p50 {p50:8.1f} us, p99 {p99:8.1f} us")
+
+
+async def measure(
+    name: str, write: typing.Callable[[Summary], typing.Awaitable[None]]
+) -> None:
+    summary = Summary()
+    latencies = []
+    for _ in range(WRITES):
+        summary.add_raw(SECTION)
+        started = time.perf_counter()
+        await write(summary)
+        latencies.append(time.perf_counter() - started)
+    report(name, latencies)
+
+
+async def main() -> None:
+    limits.set_limit("STEP_SUMMARY", None)
+    with tempfile.NamedTemporaryFile() as f:
+        os.environ[SUMMARY_ENV_VAR] = f.name
+        await measure("aiofiles (previous)", write_aiofiles)
+        await measure("write (one executor hop)", write_executor)
+        await measure("write_sync", write_sync)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+Lines/sec of `core.info` and `core.warning` with the default unbuffered writer
+and the buffered writer. Output goes through a write-through stream on an OS
+pipe drained by a background thread, like an unbuffered (`python -u`) step
+talking to the runner.
+
+    python benchmarks/bench_writer.py
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+
+from actions.core import info, warning
+from actions.core.writer import BufferedWriter, StreamWriter, set_writer
+
+LINES = 200_000
+
+
+def drain(fd: int) -> None:
+    while os.read(fd, 1 << 16):
+        pass
+
+
+def run(label: str, writer: StreamWriter) -> None:
+    previous = set_writer(writer)
+    started = time.perf_counter()
+    for i in range(LINES // 2):
+        info(f"src/module_{i % 97}.py: checked")
+        warning(f"unused import in module {i}")
+    writer.flush()
+    elapsed = time.perf_counter() - started
+    set_writer(previous)
+    sys.__stdout__.write(f"{label:<10} {LINES / elapsed:>12,.0f} lines/sec\n")
+
+
+def main() -> None:
+    read_fd, write_fd = os.pipe()
+    reader = threading.Thread(target=drain, args=(read_fd,))
+    reader.start()
+
+    stream = io.TextIOWrapper(io.FileIO(write_fd, "w"), write_through=True)
+    run("unbuffered", StreamWriter(stream))
+    run("buffered", BufferedWriter(stream))
+    stream.close()
+
+    reader.join()
+    os.close(read_fd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import yaml
+
+import actions.core
+from actions.core import action_inputs
+from actions.core.action_inputs import load_inputs, read_action_metadata
+from actions.core.core import refresh_inputs
+from tests.utils import capture_output
+
+ACTION_YML = """
+name: test
+inputs:
+  name:
+    required: true
+  count:
+    default: "1"
+  ratio:
+    required: false
+  dry-run:
+    default: false
+  config:
+    required: false
+  workdir:
+    required: false
+  files:
+    required: false
+  level:
+    default: info
+"""
+
+TYPES = {
+    "count": "int",
+    "ratio": "float",
+    "config": "json",
+    "workdir": "path",
+    "files": "list",
+    "level": ["debug", "info", "warning"],
+}
+
+
+class TestActionInputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.action_path = self.tmp_dir.name
+        with open(os.path.join(self.action_path, "action.yml"), "w") as f:
+            f.write(ACTION_YML)
+        action_inputs._metadata_cache.clear()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        refresh_inputs()
+
+    def load(self, env, **kwargs):
+        with patch.dict(os.environ, env):
+            refresh_inputs()
+            return load_inputs(TYPES, action_path=self.action_path, **kwargs)
+
+    def test_load_inputs(self):
+        values = self.load(
+            {
+                "INPUT_NAME": "  toolkit  ",
+                "INPUT_COUNT": "3",
+                "INPUT_RATIO": "0.5",
+                "INPUT_DRY-RUN": "TRUE",
+                "INPUT_CONFIG": '{"a": [1, 2]}',
+                "INPUT_WORKDIR": "src/app",
+                "INPUT_FILES": "a.py\n\n  b.py\n",
+                "INPUT_LEVEL": "warning",
+            }
+        )
+
+        self.assertEqual(
+            values,
+            {
+                "name": "toolkit",
+                "count": 3,
+                "ratio": 0.5,
+                "dry-run": True,
+                "config": {"a": [1, 2]},
+                "workdir": pathlib.Path("src/app"),
+                "files": ["a.py", "b.py"],
+                "level": "warning",
+            },
+        )
+
+    def test_load_inputs_empty_optional_inputs(self):
+        values = self.load({"INPUT_NAME": "toolkit"})
+
+        self.assertEqual(values["count"], None)
+        self.assertEqual(values["ratio"], None)
+        self.assertEqual(values["dry-run"], None)
+        self.assertEqual(values["workdir"], None)
+        self.assertEqual(values["files"], [])
+        self.assertEqual(values["level"], None)
+
+    def test_load_inputs_reports_all_errors(self):
+        env = {
+            "INPUT_COUNT": "three",
+            "INPUT_DRY-RUN": "yes",
+            "INPUT_CONFIG": "{",
+            "INPUT_LEVEL": "verbose",
+        }
+        with self.assertRaises(Exception) as context:
+            capture_output(self.load, env)
+
+        self.assertEqual(str(context.exception), "5 invalid input(s)")
+
+    def test_load_inputs_error_annotations(self):
+        messages = []
+        env = {"INPUT_NAME": "toolkit", "INPUT_LEVEL": "verbose"}
+        with patch.object(action_inputs, "error", messages.append):
+            with self.assertRaises(Exception) as context:
+                self.load(env)
+
+        self.assertEqual(str(context.exception), "1 invalid input(s)")
+        self.assertEqual(
+            messages,
+            ["Invalid input 'level': 'verbose' is not one of debug, info, warning"],
+        )
+
+    def test_load_inputs_unknown_input(self):
+        with self.assertRaises(Exception) as context:
+            load_inputs({"missing": "int"}, action_path=self.action_path)
+
+        self.assertEqual(str(context.exception), "Unknown inputs: missing")
+
+    def test_load_inputs_is_imported_on_first_use(self):
+        code = (
+            "import sys, actions.core; "
+            "assert 'yaml' not in sys.modules; "
+            "assert 'actions.core.action_inputs' not in sys.modules"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+        self.assertIs(actions.core.load_inputs, load_inputs)
+
+    def test_read_action_metadata_is_cached(self):
+        with patch.object(yaml, "safe_load", wraps=yaml.safe_load) as safe_load:
+            first = read_action_metadata(self.action_path)
+            second = read_action_metadata(self.action_path)
+
+        self.assertIs(first, second)
+        self.assertEqual(safe_load.call_count, 1)
+
+    def test_read_action_metadata_runner_temp_cache(self):
+        with tempfile.TemporaryDirectory() as runner_temp:
+            with patch.dict(os.environ, {"RUNNER_TEMP": runner_temp}):
+                expected = read_action_metadata(self.action_path)
+                action_inputs._metadata_cache.clear()
+
+                with patch.object(yaml, "safe_load") as safe_load:
+                    self.assertEqual(read_action_metadata(self.action_path), expected)
+                safe_load.assert_not_called()
+
+    def test_read_action_metadata_reloads_changed_file(self):
+        read_action_metadata(self.action_path)
+
+        path = os.path.join(self.action_path, "action.yml")
+        with open(path, "w") as f:
+            f.write("name: changed\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        self.assertEqual(read_action_metadata(self.action_path), {"name": "changed"})
+
+    def test_read_action_metadata_missing(self):
+        with tempfile.TemporaryDirectory() as empty_dir:
+            with self.assertRaises(Exception) as context:
+                read_action_metadata(empty_dir)
+
+        self.assertEqual(
+            str(context.exception),
+            f"Unable to find action metadata (action.yml) in {empty_dir}",
+        )
@@ -1,6 +1,12 @@
 import unittest
 
-from actions.core.command import issue_command
+from actions.core.command import (
+    escape_data,
+    escape_data_many,
+    escape_property,
+    escape_property_many,
+    issue_command,
+)
 from tests.utils import capture_output
 
 
@@ -126,3 +132,20 @@ class TestCommand(unittest.TestCase):
                 '::{"test":"object"}'
             ),
         )
+
+    def test_escape_returns_clean_values_unchanged(self):
+        value = "nothing to escape here " * 100
+        self.assertIs(escape_data(value), value)
+        self.assertIs(escape_property(value), value)
+
+    def test_escape_data_does_not_escape_property_characters(self):
+        self.assertEqual(escape_data("a:b,c%\r\n"), "a:b,c%25%0D%0A")
+        self.assertEqual(escape_property("a:b,c%\r\n"), "a%3Ab%2Cc%25%0D%0A")
+
+    def test_escape_many_matches_single_escape(self):
+        values = ["plain", "multi\nline", "", "100%", None, {"a": "b:c"}, "a\x00b"]
+        self.assertListEqual(escape_data_many(values), [escape_data(v) for v in values])
+        self.assertListEqual(
+            escape_property_many(values), [escape_property(v) for v in values]
+        )
+        self.assertListEqual(escape_data_many([]), [])
@@ -5,31 +5,42 @@ import sys
 import typing
 import unittest
 import uuid
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
-from actions.core import _process
+from actions.core import _process, core
 from actions.core.core import (
     ExitCode,
     add_path,
+    add_paths,
+    annotate_many,
     debug,
     end_group,
     error,
     export_variable,
+    export_variables,
     get_boolean_input,
     get_input,
+    get_inputs,
     get_multiline_input,
     get_state,
     group,
+    has_path,
+    info,
     is_debug,
+    iter_multiline_input,
     notice,
+    refresh_inputs,
     save_state,
+    save_states,
     set_command_echo,
     set_failed,
     set_output,
+    set_outputs,
     set_secret,
     start_group,
     warning,
 )
+from actions.core.redaction import redactor
 from tests.utils import (
     async_capture_output,
     capture_output,
@@ -65,6 +76,7 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
         "INPUT_WITH_TRAILING_WHITESPACE": "  some val  ",
         "INPUT_MY_INPUT_LIST": "val1\nval2\nval3",
         "INPUT_LIST_WITH_TRAILING_WHITESPACE": "  val1  \n  val2  \n  ",
+        "INPUT_COMMA_LIST": " val1, val2\r\n\n  \nval3,,val1 \nval2",
         # Save inputs
         "STATE_TEST_1": "state_val",
         # Set debug
@@ -83,12 +95,25 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
         self.uuid_mocked.start()
         self.environ_mocked = patch.dict("os.environ", self.env_vars)
         self.environ_mocked.start()
+        self.annotations_mocked = patch.dict(
+            "actions.core.core._annotation_counts", clear=True
+        )
+        self.annotations_mocked.start()
+        self.suppressed_mocked = patch.dict(
+            "actions.core.core._suppressed_annotations", clear=True
+        )
+        self.suppressed_mocked.start()
+        refresh_inputs()
 
     async def asyncTearDown(self):
         self.delimiter = None
         self.uuid = None
         self.uuid_mocked.stop()
         self.environ_mocked.stop()
+        self.annotations_mocked.stop()
+        self.suppressed_mocked.stop()
+        redactor.clear()
+        refresh_inputs()
 
     def test_legacy_export_variable_produces_the_correct_command_and_sets_the_env(self):
         self.assertEqual(
@@ -154,6 +179,30 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
                 ),
             )
 
+    def test_export_variables_writes_all_variables_at_once(self):
+        with mock_env_with_temporary_file("GITHUB_ENV") as f:
+            with patch("os.write", wraps=os.write) as os_write:
+                export_variables([("my var", "one"), ("my var2", 2), ("my var", 3)])
+            os_write.assert_called_once()
+            f.assertFileEqual(
+                self,
+                (
+                    f"my var<<{self.delimiter}{os.linesep}3{os.linesep}"
+                    f"{self.delimiter}{os.linesep}"
+                    f"my var2<<{self.delimiter}{os.linesep}2{os.linesep}"
+                    f"{self.delimiter}{os.linesep}"
+                ),
+            )
+        self.assertEqual(os.getenv("my var"), "3")
+        self.assertEqual(os.getenv("my var2"), "2")
+
+    def test_legacy_export_variables_produces_the_correct_commands(self):
+        self.assertEqual(
+            capture_output(export_variables, {"my var": "var val", "my var2": True}),
+            f"::set-env name=my var::var val{os.linesep}::set-env name=my var2::true",
+        )
+        self.assertEqual(os.getenv("my var"), "var val")
+
     def test_set_secret_produces_the_correct_command(self):
         self.assertEqual(
             capture_output(set_secret, "secret val"), "::add-mask::secret val"
@@ -163,6 +212,45 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
             "::add-mask::multi%0Aline%0D%0Asecret",
         )
 
+    def test_set_secret_masks_secret_in_toolkit_output(self):
+        capture_output(set_secret, "secret val")
+        self.assertEqual(capture_output(info, "the secret val"), "the ***")
+        self.assertEqual(
+            capture_output(warning, "secret val", {"title": "secret val"}),
+            "::warning title=***::***",
+        )
+        self.assertEqual(
+            capture_output(set_secret, "secret val 2"), "::add-mask::secret val 2"
+        )
+        # Later steps read outputs, they keep the real values.
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            set_output("my out", "secret val 2, secret val")
+            set_outputs({"other": "secret val"})
+            f.assertFileEqual(
+                self,
+                (
+                    f"my out<<{self.delimiter}{os.linesep}secret val 2, secret val"
+                    f"{os.linesep}{self.delimiter}{os.linesep}"
+                    f"other<<{self.delimiter}{os.linesep}secret val{os.linesep}"
+                    f"{self.delimiter}{os.linesep}"
+                ),
+            )
+
+    def test_set_secret_keeps_secret_in_legacy_commands(self):
+        capture_output(set_secret, "secret val")
+        self.assertEqual(
+            capture_output(set_output, "my out", "secret val"),
+            f"{os.linesep}::set-output name=my out::secret val",
+        )
+        self.assertEqual(
+            capture_output(export_variable, "my var", "secret val"),
+            "::set-env name=my var::secret val",
+        )
+        self.assertEqual(
+            capture_output(save_state, "state_1", "secret val"),
+            "::save-state name=state_1::secret val",
+        )
+
     def test_legacy_add_path_produces_the_correct_commands_and_sets_the_env(self):
         capture_output(add_path, "myPath")
         self.assertEqual(os.getenv("PATH"), f"myPath{os.pathsep}path1{os.pathsep}path2")
@@ -175,6 +263,44 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
             )
             f.assertFileEqual(self, f"myPath{os.linesep}")
 
+    def test_legacy_add_paths_produces_the_correct_commands_and_sets_the_env(self):
+        self.assertEqual(
+            capture_output(add_paths, ["path3", "path4"]),
+            f"::add-path::path4{os.linesep}::add-path::path3",
+        )
+        self.assertEqual(
+            os.getenv("PATH"),
+            f"path3{os.pathsep}path4{os.pathsep}path1{os.pathsep}path2",
+        )
+
+    def test_add_paths_produces_the_correct_commands_and_sets_the_env(self):
+        with mock_env_with_temporary_file("GITHUB_PATH") as f:
+            self.assertEqual(
+                capture_output(add_paths, ["path3", "path2", "path4", "path3"]), ""
+            )
+            self.assertEqual(
+                os.getenv("PATH"),
+                f"path3{os.pathsep}path4{os.pathsep}path1{os.pathsep}path2",
+            )
+            f.assertFileEqual(self, f"path4{os.linesep}path3{os.linesep}")
+
+    def test_add_paths_returns_the_added_paths(self):
+        with mock_env_with_temporary_file("GITHUB_PATH") as f:
+            self.assertEqual(add_paths(["path1", "path3", "path3"]), ["path3"])
+            self.assertEqual(add_paths(["path1", "path3"]), [])
+            f.assertFileEqual(self, f"path3{os.linesep}")
+
+    def test_has_path(self):
+        self.assertTrue(has_path("path1"))
+        self.assertFalse(has_path("path3"))
+
+        capture_output(add_paths, ["path3"])
+        self.assertTrue(has_path("path3"))
+
+        os.environ["PATH"] = "path4"
+        self.assertTrue(has_path("path4"))
+        self.assertFalse(has_path("path1"))
+
     def test_get_input_gets_non_rqeuired_input(self):
         self.assertEqual(get_input("my input"), "val")
 
@@ -215,6 +341,24 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
             get_input("with trailing whitespace", trim_whitespace=False), "  some val  "
         )
 
+    def test_get_input_reads_environment_once(self):
+        self.assertEqual(get_input("my input"), "val")
+        with patch.dict("os.environ", {"INPUT_MY_INPUT": "changed"}):
+            self.assertEqual(get_input("my input"), "val")
+            refresh_inputs()
+            self.assertEqual(get_input("my input"), "changed")
+
+    def test_get_inputs_returns_all_inputs(self):
+        inputs = get_inputs()
+        self.assertEqual(inputs["my_input"], "val")
+        self.assertEqual(inputs["with_trailing_whitespace"], "some val")
+        self.assertEqual(inputs["missing"], "")
+        self.assertNotIn("test_1", inputs)
+        self.assertEqual(
+            get_inputs(trim_whitespace=False)["with_trailing_whitespace"],
+            "  some val  ",
+        )
+
     def test_get_boolean_input_gets_non_rqeuired_input(self):
         self.assertTrue(get_boolean_input("boolean input"))
 
@@ -263,6 +407,41 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
             ["  val1  ", "  val2  ", "  "],
         )
 
+    def test_iter_multiline_input_works(self):
+        entries = iter_multiline_input("my input list")
+        self.assertIsInstance(entries, typing.Iterator)
+        self.assertListEqual(list(entries), ["val1", "val2", "val3"])
+
+    def test_iter_multiline_input_skips_blank_entries(self):
+        self.assertListEqual(
+            list(iter_multiline_input("comma list")),
+            ["val1, val2", "val3,,val1", "val2"],
+        )
+
+    def test_iter_multiline_input_trims_whitespace_when_option_is_false(self):
+        self.assertListEqual(
+            list(iter_multiline_input("comma list", trim_whitespace=False)),
+            [" val1, val2", "  ", "val3,,val1 ", "val2"],
+        )
+
+    def test_iter_multiline_input_split_commas(self):
+        self.assertListEqual(
+            list(iter_multiline_input("comma list", split_commas=True)),
+            ["val1", "val2", "val3", "val1", "val2"],
+        )
+
+    def test_iter_multiline_input_unique(self):
+        self.assertListEqual(
+            list(iter_multiline_input("comma list", split_commas=True, unique=True)),
+            ["val1", "val2", "val3"],
+        )
+
+    def test_iter_multiline_input_required(self):
+        with self.assertRaisesRegex(
+            Exception, "^Input required and not supplied: missing$"
+        ):
+            iter_multiline_input("missing", required=True)
+
     def test_legacy_set_output_produces_the_correct_command(self):
         self.assertEqual(
             capture_output(set_output, "some output", "some value"),
@@ -314,6 +493,52 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
                 ),
             )
 
+    def test_set_output_streams_file_objects(self):
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            set_output("my out", io.BytesIO(b"out val"))
+            f.assertFileEqual(
+                self,
+                (
+                    f"my out<<{self.delimiter}{os.linesep}out val{os.linesep}"
+                    f"{self.delimiter}{os.linesep}"
+                ),
+            )
+
+    def test_legacy_set_output_reads_file_objects(self):
+        self.assertEqual(
+            capture_output(set_output, "some output", io.StringIO("some value")),
+            f"{os.linesep}::set-output name=some output::some value",
+        )
+
+    def test_set_outputs_writes_all_outputs_at_once(self):
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            with patch("os.write", wraps=os.write) as os_write:
+                set_outputs({"my out": "out val", "my out2": {"a": 1}})
+            os_write.assert_called_once()
+            f.assertFileEqual(
+                self,
+                (
+                    f"my out<<{self.delimiter}{os.linesep}out val{os.linesep}"
+                    f"{self.delimiter}{os.linesep}"
+                    f'my out2<<{self.delimiter}{os.linesep}{{"a":1}}{os.linesep}'
+                    f"{self.delimiter}{os.linesep}"
+                ),
+            )
+
+    def test_set_outputs_with_no_outputs(self):
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            set_outputs({})
+            f.assertFileEqual(self, "")
+
+    def test_legacy_set_outputs_produces_the_correct_commands(self):
+        self.assertEqual(
+            capture_output(set_outputs, [("out", 1), ("out", 2), ("out2", False)]),
+            (
+                f"{os.linesep}::set-output name=out::2{os.linesep}"
+                f"{os.linesep}::set-output name=out2::false"
+            ),
+        )
+
     def test_set_failed_sets_the_correct_exit_code_and_failure_message(self):
         self.assertEqual(
             capture_output(set_failed, "Failure message"), "::error::Failure message"
@@ -480,6 +705,29 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
             capture_output(debug, "\r\ndebug\n"), "::debug::%0D%0Adebug%0A"
         )
 
+    def test_debug_skips_lazy_messages_when_debug_is_off(self):
+        is_debug()
+        message = Mock(return_value="expensive")
+        self.assertEqual(capture_output(debug, message), "")
+        self.assertEqual(capture_output(debug, "%s", message), "")
+        message.assert_not_called()
+
+    def test_debug_evaluates_lazy_messages_when_debug_is_on(self):
+        os.environ["RUNNER_DEBUG"] = "1"
+        is_debug()
+        self.assertEqual(capture_output(debug, lambda: "lazy"), "::debug::lazy")
+        self.assertEqual(
+            capture_output(debug, "%s items in %.1fs", 3, 0.25),
+            "::debug::3 items in 0.2s",
+        )
+
+    def test_debug_caches_debug_state(self):
+        is_debug()
+        os.environ["RUNNER_DEBUG"] = "1"
+        self.assertEqual(capture_output(debug, lambda: "lazy"), "")
+        is_debug()
+        self.assertEqual(capture_output(debug, lambda: "lazy"), "::debug::lazy")
+
     def test_legacy_save_state_produces_the_correct_command(self):
         self.assertEqual(
             capture_output(save_state, "state_1", "some value"),
@@ -530,9 +778,37 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
                 ),
             )
 
+    def test_save_states_writes_all_states_at_once(self):
+        with mock_env_with_temporary_file("GITHUB_STATE") as f:
+            save_states({"state 1": "one", "state 2": 2})
+            f.assertFileEqual(
+                self,
+                (
+                    f"state 1<<{self.delimiter}{os.linesep}one{os.linesep}"
+                    f"{self.delimiter}{os.linesep}"
+                    f"state 2<<{self.delimiter}{os.linesep}2{os.linesep}"
+                    f"{self.delimiter}{os.linesep}"
+                ),
+            )
+
+    def test_legacy_save_states_produces_the_correct_commands(self):
+        self.assertEqual(
+            capture_output(save_states, {"state_1": "some value", "state_2": 1}),
+            (
+                f"::save-state name=state_1::some value{os.linesep}"
+                "::save-state name=state_2::1"
+            ),
+        )
+
     def test_get_state_gets_wrapper_action_state(self):
         self.assertEqual(get_state("TEST_1"), "state_val")
 
+    def test_get_state_ignores_case_on_windows(self):
+        # os.environ upper-cases variable names on Windows.
+        with patch("os.name", "nt"), patch.dict(os.environ, {"STATE_MYSTATE": "v"}):
+            refresh_inputs()
+            self.assertEqual(get_state("myState"), "v")
+
     def test_is_debug_check_debug_state(self):
         self.assertFalse(is_debug())
         os.environ["RUNNER_DEBUG"] = "1"
@@ -543,3 +819,104 @@ class TestCore(unittest.IsolatedAsyncioTestCase):
 
     def test_set_command_echo_can_disable_echoing(self):
         self.assertEqual(capture_output(set_command_echo, False), "::echo::off")
+
+    def test_annotate_many_emits_all_annotations_in_one_write(self):
+        with patch("actions.core.core.get_writer") as get_writer:
+            annotate_many(
+                [
+                    ("warning", "first", None),
+                    ("error", Exception("second"), {"file": "a.py"}),
+                ]
+            )
+            get_writer.return_value.write.assert_called_once_with(
+                f"::warning::first{os.linesep}::error file=a.py::second{os.linesep}"
+            )
+
+    def test_annotate_many_dedups_and_sorts_by_file(self):
+        self.assertEqual(
+            capture_output(
+                annotate_many,
+                [
+                    ("error", "boom", {"file": "b.py", "start_line": 2}),
+                    ("error", "boom", {"file": "a.py", "start_line": 9}),
+                    ("error", "boom", {"file": "b.py", "start_line": 2}),
+                    ("error", "boom", {"file": "a.py", "start_line": 1}),
+                    ("notice", "boom", {"file": "b.py", "start_line": 2}),
+                ],
+            ),
+            os.linesep.join(
+                [
+                    "::error file=a.py,line=1::boom",
+                    "::error file=a.py,line=9::boom",
+                    "::error file=b.py,line=2::boom",
+                    "::notice file=b.py,line=2::boom",
+                ]
+            ),
+        )
+
+    def test_annotate_many_suppresses_annotations_over_the_limit(self):
+        records = [("warning", f"warning {i}", None) for i in range(15)]
+        records += [("error", f"error {i}", None) for i in range(4)]
+        output = capture_output(annotate_many, records, {"error": 2, "notice": 1})
+        self.assertEqual(
+            output,
+            os.linesep.join(
+                [
+                    *[f"::warning::warning {i}" for i in range(10)],
+                    "::error::error 0",
+                    "::error::error 1",
+                ]
+            ),
+        )
+        self.assertEqual(
+            capture_output(core._report_suppressed_annotations),
+            "::notice::7 more annotations suppressed (5 warning, 2 error)",
+        )
+        self.assertEqual(capture_output(core._report_suppressed_annotations), "")
+
+    def test_annotate_many_keeps_a_notice_for_the_suppressed_count(self):
+        records = [("notice", f"notice {i}", None) for i in range(12)]
+        output = capture_output(annotate_many, records)
+        self.assertEqual(
+            output, os.linesep.join(f"::notice::notice {i}" for i in range(9))
+        )
+        self.assertEqual(
+            capture_output(core._report_suppressed_annotations),
+            "::notice::3 more annotations suppressed (3 notice)",
+        )
+
+    def test_annotate_many_applies_limits_across_calls(self):
+        first = [("error", f"first {i}", None) for i in range(3)]
+        second = [("error", f"second {i}", None) for i in range(3)]
+        third = [("error", "third", None), ("warning", "third", None)]
+        limits: typing.Dict[typing.Any, typing.Optional[int]] = {
+            "error": 4,
+            "warning": 0,
+        }
+        self.assertEqual(
+            capture_output(annotate_many, first, limits),
+            os.linesep.join(f"::error::first {i}" for i in range(3)),
+        )
+        self.assertEqual(
+            capture_output(annotate_many, second, limits), "::error::second 0"
+        )
+        self.assertEqual(capture_output(annotate_many, third, limits), "")
+        self.assertEqual(
+            capture_output(core._report_suppressed_annotations),
+            "::notice::4 more annotations suppressed (3 error, 1 warning)",
+        )
+
+    def test_annotate_many_without_room_for_the_suppressed_count(self):
+        records = [("error", f"error {i}", None) for i in range(3)]
+        output = capture_output(annotate_many, records, {"error": 1, "notice": 0})
+        self.assertEqual(output, "::error::error 0")
+        self.assertEqual(capture_output(core._report_suppressed_annotations), "")
+
+    def test_annotate_many_with_no_limits(self):
+        records = [("notice", f"notice {i}", None) for i in range(20)]
+        output = capture_output(annotate_many, records, {"notice": None})
+        self.assertEqual(len(output.split(os.linesep)), 20)
+
+    def test_annotate_many_raises_on_unsupported_level(self):
+        with self.assertRaisesRegex(Exception, "Unsupported annotation level: info"):
+            annotate_many([("info", "message", None)])  # type: ignore[list-item]
@@ -0,0 +1,105 @@
+import os
+import sys
+import unittest
+import uuid
+from unittest.mock import patch
+
+from actions.core.exec_utils import stream_exec
+from actions.core.redaction import redactor
+from tests.utils import capture_output
+
+
+def python(code: str):
+    return [sys.executable, "-c", code]
+
+
+class TestExecUtils(unittest.TestCase):
+    def setUp(self):
+        self.uuid = uuid.uuid4()
+        self.uuid_mocked = patch("uuid.uuid4", return_value=self.uuid)
+        self.uuid_mocked.start()
+
+    def tearDown(self):
+        self.uuid_mocked.stop()
+        redactor.clear()
+
+    def test_streams_output_between_stop_commands_tokens(self):
+        output = capture_output(
+            stream_exec,
+            python("print('::warning::injected'); print('done')"),
+        )
+        self.assertEqual(
+            output,
+            os.linesep.join(
+                [
+                    f"::stop-commands::{self.uuid.hex}",
+                    "::warning::injected",
+                    "done",
+                    f"::{self.uuid.hex}::",
+                ]
+            ),
+        )
+
+    def test_wraps_output_in_group(self):
+        output = capture_output(
+            stream_exec,
+            python("print('hello')"),
+            group="my-group",
+            stop_commands=False,
+        )
+        self.assertEqual(
+            output,
+            os.linesep.join(["::group::my-group", "hello", "::endgroup::"]),
+        )
+
+    def test_interleaves_stderr_and_adds_missing_newline(self):
+        output = capture_output(
+            stream_exec,
+            python(
+                "import sys; sys.stdout.write('out\\n'); sys.stdout.flush(); "
+                "sys.stderr.write('err')"
+            ),
+            stop_commands=False,
+        )
+        self.assertEqual(output, f"out{os.linesep}err")
+
+    def test_returns_exit_code(self):
+        exit_codes = []
+        capture_output(
+            lambda: exit_codes.append(stream_exec(python("raise SystemExit(3)")))
+        )
+        self.assertEqual(exit_codes, [3])
+
+    def test_forwards_large_output_in_chunks(self):
+        output = capture_output(
+            stream_exec,
+            python("import sys; sys.stdout.write('x' * 1_000_000 + '\\n')"),
+            stop_commands=False,
+            chunk_size=4096,
+        )
+        self.assertEqual(output, "x" * 1_000_000)
+
+    def test_redacts_secrets(self):
+        redactor.add("hunter2")
+        output = capture_output(
+            stream_exec,
+            python("print('password: hunter2'); print('hunter', end='')"),
+            stop_commands=False,
+            chunk_size=3,
+        )
+        self.assertEqual(output, f"password: ***{os.linesep}hunter")
+
+    def test_redacts_long_lines_without_holding_them(self):
+        redactor.add("hunter2")
+        with patch("actions.core.writer.StreamWriter.write_bytes") as write_bytes:
+            write_bytes.side_effect = lambda data: sys.stdout.write(
+                bytes(data).decode()
+            )
+            output = capture_output(
+                stream_exec,
+                python("import sys; sys.stdout.write('\\rhunter2 50%' * 10_000)"),
+                stop_commands=False,
+                chunk_size=1000,
+            )
+        self.assertEqual(output, "\r*** 50%" * 10_000)
+        self.assertGreater(write_bytes.call_count, 50)
@@ -1,10 +1,20 @@
+import io
 import os
 import typing
 import unittest
 import uuid
 from unittest.mock import patch
 
-from actions.core.file_command import issue_file_command, prepare_key_value_message
+from actions.core import file_command
+from actions.core.file_command import (
+    FileCommandReader,
+    close_file_commands,
+    issue_file_command,
+    issue_key_value_file_command,
+    iter_key_value_message,
+    prepare_key_value_message,
+    read_file_command,
+)
 from tests.utils import mock_env_with_temporary_file
 
 
@@ -28,6 +38,44 @@ class TestFileCommand(unittest.TestCase):
             issue_file_command("STATE", "test")
             f.assertFileEqual(self, f"test{os.linesep}")
 
+    def test_issue_file_command_opens_file_once(self):
+        with mock_env_with_temporary_file("GITHUB_STATE") as f:
+            with patch("os.open", wraps=os.open) as os_open:
+                for i in range(3):
+                    issue_file_command("STATE", f"test {i}")
+            os_open.assert_called_once()
+            f.assertFileEqual(self, "".join(f"test {i}{os.linesep}" for i in range(3)))
+
+    def test_issue_file_command_reopens_when_env_var_changes(self):
+        with mock_env_with_temporary_file("GITHUB_STATE") as first:
+            issue_file_command("STATE", "first")
+            with mock_env_with_temporary_file("GITHUB_STATE") as second:
+                issue_file_command("STATE", "second")
+                second.assertFileEqual(self, f"second{os.linesep}")
+            first.assertFileEqual(self, f"first{os.linesep}")
+
+    def test_issue_file_command_without_revalidation(self):
+        with mock_env_with_temporary_file("GITHUB_STATE") as f:
+            issue_file_command("STATE", "first")
+            with patch.object(file_command, "REVALIDATE_FILE_COMMAND_PATHS", False):
+                with patch.dict("os.environ", {"GITHUB_STATE": "/moved"}):
+                    issue_file_command("STATE", "second")
+            f.assertFileEqual(self, f"first{os.linesep}second{os.linesep}")
+
+    def test_raises_if_env_var_is_not_set(self):
+        with patch.dict("os.environ", {"GITHUB_STATE": ""}):
+            with self.assertRaisesRegex(
+                Exception, "Unable to find environment variable for file command STATE"
+            ):
+                issue_file_command("STATE", "test")
+
+    def test_raises_if_file_does_not_exist(self):
+        with mock_env_with_temporary_file("GITHUB_STATE") as f:
+            close_file_commands()
+            os.remove(f.f.name)
+            with self.assertRaisesRegex(Exception, "Missing file at path: "):
+                issue_file_command("STATE", "test")
+
     def test_raises_if_delimiter_in_name(self):
         error_message = (
             "Unexpected input: name should not contain the delimiter "
@@ -75,3 +123,170 @@ class TestFileCommand(unittest.TestCase):
             prepare_key_value_message("foo", {"bar": "baz"}),
             f'foo<<{self.delimiter}\n{{"bar":"baz"}}\n{self.delimiter}',
         )
+
+    def test_iter_key_value_message_matches_prepare_key_value_message(self):
+        for value in (None, "bar", "", 5, True, {"bar": "baz", 1: [1, 2]}, [], {}):
+            for chunk_size in (1, 7, 1024):
+                self.assertEqual(
+                    b"".join(iter_key_value_message("foo", value, chunk_size)),
+                    prepare_key_value_message("foo", value).encode(),
+                )
+
+    def test_iter_key_value_message_with_streamed_values(self):
+        expected = f"foo<<{self.delimiter}{os.linesep}héllo wörld{os.linesep}"
+        expected += f"{self.delimiter}"
+        for value in (
+            "héllo wörld".encode(),
+            memoryview("héllo wörld".encode()),
+            io.BytesIO("héllo wörld".encode()),
+            io.StringIO("héllo wörld"),
+            iter(["héllo", b" ", "wörld"]),
+        ):
+            self.assertEqual(
+                b"".join(iter_key_value_message("foo", value, 3)).decode(), expected
+            )
+
+    def test_iter_key_value_message_streams_json_in_chunks(self):
+        value = {f"key{i}": list(range(10)) for i in range(1000)}
+        with patch.object(file_command, "_JSON_BATCH_SIZE", 10):
+            chunks = list(iter_key_value_message("foo", value, 1024))
+        self.assertGreater(len(chunks), 10)
+        self.assertTrue(all(len(c) < 2048 for c in chunks))
+        self.assertEqual(
+            b"".join(chunks), prepare_key_value_message("foo", value).encode()
+        )
+
+    def test_iter_key_value_message_raises_if_delimiter_spans_chunks(self):
+        for chunk_size in (1, 5, 16, 1024):
+            value = io.StringIO(f"prefix {self.delimiter} suffix")
+            with self.assertRaisesRegex(
+                Exception, "Unexpected input: value should not contain the delimiter"
+            ):
+                list(iter_key_value_message("foo", value, chunk_size))
+
+    def test_issue_key_value_file_command_writes_small_records_at_once(self):
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            with patch("os.write", wraps=os.write) as os_write:
+                issue_key_value_file_command("OUTPUT", "foo", iter(["a", "b"]))
+            os_write.assert_called_once()
+            f.assertFileEqual(
+                self,
+                f"foo<<{self.delimiter}{os.linesep}ab{os.linesep}"
+                f"{self.delimiter}{os.linesep}",
+            )
+
+    def test_issue_key_value_file_command_streams_large_records(self):
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            with patch("os.write", wraps=os.write) as os_write:
+                issue_key_value_file_command(
+                    "OUTPUT", "foo", io.BytesIO(b"x" * 10_000), chunk_size=1024
+                )
+            self.assertGreater(os_write.call_count, 5)
+            f.assertFileEqual(
+                self,
+                f"foo<<{self.delimiter}{os.linesep}{'x' * 10_000}{os.linesep}"
+                f"{self.delimiter}{os.linesep}",
+            )
+
+    def test_issue_key_value_file_command_leaves_no_partial_record(self):
+        def value():
+            for _ in range(100):
+                yield "x" * 100
+            raise ValueError("failed")
+
+        with mock_env_with_temporary_file("GITHUB_STATE") as f:
+            with self.assertRaisesRegex(ValueError, "^failed$"):
+                issue_key_value_file_command("STATE", "big", value(), chunk_size=1024)
+            f.assertFileEqual(self, "")
+
+            issue_key_value_file_command("STATE", "next", "value")
+            self.assertDictEqual(dict(read_file_command("STATE")), {"next": "value"})
+
+
+class TestFileCommandReader(unittest.TestCase):
+    def append(self, f, data: str, newline: str = "\n") -> None:
+        with open(f.f.name, "ab") as out:
+            out.write(data.replace("\n", newline).encode())
+
+    def test_reads_values_written_by_file_commands(self):
+        with mock_env_with_temporary_file("GITHUB_OUTPUT"):
+            issue_key_value_file_command("OUTPUT", "single", "value")
+            issue_key_value_file_command("OUTPUT", "multi", "line 1\nline 2\n")
+            issue_key_value_file_command("OUTPUT", "empty", "")
+            issue_key_value_file_command("OUTPUT", "json", {"a": [1, 2]})
+            issue_file_command("OUTPUT", "plain=key=value")
+            self.assertDictEqual(
+                dict(read_file_command("OUTPUT")),
+                {
+                    "single": "value",
+                    "multi": "line 1\nline 2\n",
+                    "empty": "",
+                    "json": '{"a":[1,2]}',
+                    "plain": "key=value",
+                },
+            )
+
+    def test_reads_both_line_endings(self):
+        for newline in ("\n", "\r\n"):
+            with mock_env_with_temporary_file("GITHUB_ENV") as f:
+                self.append(
+                    f,
+                    "a<<EOF\nline 1\nline 2\nEOF\nb=2\n\nc<<EOF\nEOF\n"
+                    "d<<EOF\n\nEOF\n",
+                    newline,
+                )
+                self.assertDictEqual(
+                    dict(FileCommandReader(f.f.name).refresh()),
+                    {"a": f"line 1{newline}line 2", "b": "2", "c": "", "d": ""},
+                )
+
+    def test_ignores_delimiter_that_is_not_a_whole_line(self):
+        with mock_env_with_temporary_file("GITHUB_ENV") as f:
+            self.append(f, "a<<EOF\nEOFX\nEOF\n")
+            self.assertDictEqual(
+                dict(FileCommandReader(f.f.name).refresh()), {"a": "EOFX"}
+            )
+
+    def test_only_parses_appended_and_complete_records(self):
+        with mock_env_with_temporary_file("GITHUB_STATE") as f:
+            reader = FileCommandReader(f.f.name)
+            self.append(f, "a=1\nb<<EOF\npartial")
+            self.assertDictEqual(dict(reader.refresh()), {"a": "1"})
+
+            self.append(f, " value\nEOF\nc=")
+            self.assertDictEqual(
+                dict(reader.refresh()), {"a": "1", "b": "partial value"}
+            )
+
+            self.append(f, "3\na=4\n")
+            with patch.object(reader, "_parse", wraps=reader._parse) as parse:
+                reader.refresh()
+            self.assertEqual(
+                parse.call_args.args[1], len("a=1\nb<<EOF\npartial value\nEOF\n")
+            )
+            self.assertDictEqual(
+                dict(reader), {"a": "4", "b": "partial value", "c": "3"}
+            )
+
+    def test_starts_over_when_file_shrinks(self):
+        with mock_env_with_temporary_file("GITHUB_STATE") as f:
+            reader = FileCommandReader(f.f.name)
+            self.append(f, "a=1\nb=2\n")
+            reader.refresh()
+            with open(f.f.name, "w") as out:
+                out.write("c=3\n")
+            self.assertDictEqual(dict(reader.refresh()), {"c": "3"})
+
+    def test_raises_on_invalid_format(self):
+        with mock_env_with_temporary_file("GITHUB_ENV") as f:
+            self.append(f, "no separator\n")
+            with self.assertRaisesRegex(Exception, "Invalid format 'no separator'"):
+                FileCommandReader(f.f.name).refresh()
+
+    def test_read_file_command_reuses_reader(self):
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            self.append(f, "a=1\n")
+            reader = read_file_command("OUTPUT")
+            self.append(f, "b=2\n")
+            self.assertIs(read_file_command("OUTPUT"), reader)
+            self.assertDictEqual(dict(reader), {"a": "1", "b": "2"})
@@ -0,0 +1,167 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import warnings
+from unittest.mock import patch
+
+import actions.core
+from actions.core import junit
+from actions.core.summary import Summary
+from tests.utils import capture_output
+
+REPORT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="unit" tests="4">
+    <properties><property name="python" value="3.12"/></properties>
+    <testcase classname="tests.test_a" name="test_ok" time="0.5"/>
+    <testcase classname="tests.test_a" name="test_fails" time="1,250.0"
+              file="tests/test_a.py" line="12">
+      <failure message="assert 1 == 2">Traceback
+AssertionError</failure>
+      <system-out>lots of output</system-out>
+    </testcase>
+    <testcase classname="tests.test_a" name="test_skipped" time="0">
+      <skipped message="not on linux"/>
+    </testcase>
+    <testcase classname="tests.test_b" name="test_error" time="2">
+      <error>RuntimeError: boom</error>
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+class TestJUnit(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_report(self, name: str, content: str = REPORT) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_parses_a_report(self):
+        report = junit.parse_junit(self.write_report("report.xml"))
+        self.assertEqual(
+            report.counts, {"passed": 1, "failed": 1, "error": 1, "skipped": 1}
+        )
+        self.assertEqual(report.tests, 4)
+        self.assertEqual(report.time, 1252.5)
+        self.assertEqual(
+            report.failures,
+            [
+                junit.JUnitCase(
+                    suite="unit",
+                    classname="tests.test_a",
+                    name="test_fails",
+                    time=1250.0,
+                    outcome="failed",
+                    message="assert 1 == 2",
+                    details="Traceback\nAssertionError",
+                    file="tests/test_a.py",
+                    line=12,
+                ),
+                junit.JUnitCase(
+                    suite="unit",
+                    classname="tests.test_b",
+                    name="test_error",
+                    time=2.0,
+                    outcome="error",
+                    details="RuntimeError: boom",
+                ),
+            ],
+        )
+        self.assertEqual(
+            [case.name for case in report.slowest],
+            ["test_fails", "test_error", "test_ok", "test_skipped"],
+        )
+
+    def test_keeps_the_slowest_test_cases(self):
+        cases = "".join(
+            f'<testcase name="test_{i}" time="{i % 7}"/>' for i in range(100)
+        )
+        path = self.write_report("report.xml", f"<testsuite>{cases}</testsuite>")
+        report = junit.parse_junit(path, slowest=3)
+        self.assertEqual(
+            [case.name for case in report.slowest], ["test_6", "test_13", "test_20"]
+        )
+
+    def test_keeps_the_first_failures(self):
+        cases = '<testcase name="test"><failure/></testcase>' * 5
+        path = self.write_report("report.xml", f"<testsuite>{cases}</testsuite>")
+        report = junit.parse_junit(path, max_failures=2)
+        self.assertEqual(report.counts["failed"], 5)
+        self.assertEqual(len(report.failures), 2)
+
+    def test_reads_reports_in_processes(self):
+        for i in range(junit.PROCESS_POOL_MIN_FILES):
+            self.write_report(f"report-{i}.xml")
+        pattern = os.path.join(self.directory.name, "*.xml")
+        # Forking while another thread runs (e.g. the buffered writer's flush
+        # timer) warns, and may deadlock the child.
+        stop = threading.Event()
+        thread = threading.Thread(target=stop.wait)
+        thread.start()
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                report = junit.read_junit(pattern, processes=2)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertEqual([str(w.message) for w in caught], [])
+        sequential = junit.read_junit(pattern, processes=1)
+
+        files = junit.PROCESS_POOL_MIN_FILES
+        self.assertEqual(report.counts["failed"], files)
+        self.assertEqual(report.tests, 4 * files)
+        self.assertEqual(report.counts, sequential.counts)
+        self.assertEqual(report.failures, sequential.failures)
+        self.assertEqual(report.slowest, sequential.slowest)
+
+    def test_report_junit_is_imported_on_first_use(self):
+        code = (
+            "import sys, actions.core; "
+            "assert 'actions.core.junit' not in sys.modules; "
+            "assert 'concurrent.futures.process' not in sys.modules"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+        self.assertIs(actions.core.report_junit, junit.report_junit)
+
+    def test_annotates_failures(self):
+        report = junit.parse_junit(self.write_report("report.xml"))
+        with patch.dict("actions.core.core._annotation_counts", clear=True):
+            output = capture_output(junit.annotate_junit_failures, report)
+        self.assertEqual(
+            output,
+            f"::error title=tests.test_b.test_error::RuntimeError: boom{os.linesep}"
+            "::error title=tests.test_a.test_fails,file=tests/test_a.py,line=12"
+            "::assert 1 == 2",
+        )
+
+    def test_adds_a_summary(self):
+        report = junit.parse_junit(self.write_report("report.xml"), slowest=2)
+        target = junit.add_junit_summary(report, target=Summary())
+        nl = os.linesep
+        self.assertEqual(
+            target.stringify(),
+            f"<h2>Test results</h2>{nl}"
+            "<p>4 tests: 1 passed, 1 failed, 1 errors, 1 skipped in 1252.50s</p>"
+            f"{nl}<h3>Failing tests</h3>{nl}"
+            "<table><tr><th>Test</th><th>Message</th><th>Time</th></tr>"
+            "<tr><td>tests.test_a.test_fails</td><td>assert 1 == 2</td>"
+            "<td>1250.000s</td></tr><tr><td>tests.test_b.test_error</td>"
+            "<td>RuntimeError: boom</td><td>2.000s</td></tr></table>"
+            f"{nl}<h3>Slowest tests</h3>{nl}"
+            "<table><tr><th>Test</th><th>Result</th><th>Time</th></tr>"
+            "<tr><td>tests.test_a.test_fails</td><td>failed</td>"
+            "<td>1250.000s</td></tr><tr><td>tests.test_b.test_error</td>"
+            f"<td>error</td><td>2.000s</td></tr></table>{nl}",
+        )
@@ -0,0 +1,240 @@
+import io
+import os
+import tempfile
+import unittest
+import uuid
+from unittest.mock import patch
+
+from actions.core import limits
+from actions.core.core import set_outputs
+from actions.core.file_command import (
+    issue_file_command,
+    issue_key_value_file_command,
+)
+from actions.core.summary import SUMMARY_ENV_VAR, summary
+from tests.utils import capture_output, mock_env_with_temporary_file
+
+
+class TestLimits(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.uuid = uuid.uuid4()
+        self.delimiter = f"ghadelimiter_{self.uuid}"
+        self.uuid_mocked = patch("uuid.uuid4", return_value=self.uuid)
+        self.uuid_mocked.start()
+        self.runner_temp = tempfile.TemporaryDirectory()
+        self.environ_mocked = patch.dict(
+            os.environ, {"RUNNER_TEMP": self.runner_temp.name}
+        )
+        self.environ_mocked.start()
+        limits.reset_limits()
+
+    def tearDown(self):
+        self.uuid_mocked.stop()
+        self.environ_mocked.stop()
+        self.runner_temp.cleanup()
+        limits.reset_limits()
+        summary.empty_buffer()
+        summary.size_aware(False)
+        summary._file_path = None
+
+    def record(self, value: str) -> str:
+        return f"foo<<{self.delimiter}{os.linesep}{value}{os.linesep}{self.delimiter}"
+
+    def test_set_limit_rejects_unknown_policy(self):
+        with self.assertRaisesRegex(Exception, "^Unsupported limit policy: drop$"):
+            limits.set_limit("OUTPUT", 10, "drop")  # type: ignore[arg-type]
+
+    def test_counts_bytes_from_the_initial_file_size(self):
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            f.f.write("existing\n")
+            f.f.flush()
+            issue_key_value_file_command("OUTPUT", "foo", "héllo")
+            issue_file_command("OUTPUT", "bar=baz")
+
+            self.assertEqual(limits.get_usage()["OUTPUT"], os.path.getsize(f.f.name))
+
+    def test_raise_policy(self):
+        limits.set_limit("OUTPUT", 200)
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            issue_key_value_file_command("OUTPUT", "foo", "small")
+            with self.assertRaisesRegex(
+                Exception,
+                "^Unable to write 'foo': GITHUB_OUTPUT would exceed its limit of "
+                "200 bytes$",
+            ):
+                issue_key_value_file_command("OUTPUT", "foo", io.StringIO("x" * 500))
+
+            f.assertFileEqual(self, self.record("small") + os.linesep)
+
+    def test_raise_policy_for_plain_records(self):
+        limits.set_limit("PATH", 10, "truncate")
+        with mock_env_with_temporary_file("GITHUB_PATH"):
+            issue_file_command("PATH", "/bin")
+            with self.assertRaisesRegex(
+                Exception, "^Unable to write record: GITHUB_PATH would exceed"
+            ):
+                issue_file_command("PATH", "/usr/local/bin")
+
+    def test_truncate_policy(self):
+        limits.set_limit("OUTPUT", 140, "truncate")
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            output = capture_output(
+                issue_key_value_file_command, "OUTPUT", "foo", "é" * 100
+            )
+
+            self.assertEqual(
+                output, "::warning::'foo' was truncated to fit in GITHUB_OUTPUT"
+            )
+            with open(f.f.name, encoding="utf-8") as out:
+                content = out.read()
+            self.assertLessEqual(len(content.encode()), 140)
+            self.assertTrue(content.startswith(self.record("é")[:-60]))
+            self.assertIn(f"é…{os.linesep}{self.delimiter}", content)
+
+    def test_spill_policy(self):
+        limits.set_limit("OUTPUT", 200, "spill")
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            output = capture_output(
+                issue_key_value_file_command, "OUTPUT", "foo", iter(["x" * 300] * 4)
+            )
+
+            path = os.path.join(
+                self.runner_temp.name,
+                "actions-python-core",
+                f"output-foo-{self.uuid}",
+            )
+            self.assertEqual(
+                output,
+                f"::warning::'foo' does not fit in GITHUB_OUTPUT and was written "
+                f"to {path}",
+            )
+            f.assertFileEqual(self, self.record(path) + os.linesep)
+            with open(path) as spilled:
+                self.assertEqual(spilled.read(), "x" * 1200)
+
+    def test_spill_policy_without_room_for_the_path(self):
+        limits.set_limit("OUTPUT", 150, "spill")
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            output = capture_output(
+                issue_key_value_file_command, "OUTPUT", "foo", "x" * 300
+            )
+
+            self.assertIn("'foo' does not fit in GITHUB_OUTPUT", output)
+            f.assertFileEqual(self, self.record("") + os.linesep)
+            self.assertLessEqual(limits.get_usage()["OUTPUT"], 150)
+
+    def test_bulk_records_fall_back_to_each_record(self):
+        limits.set_limit("OUTPUT", 300, "truncate")
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            output = capture_output(set_outputs, {"foo": "a", "bar": "b" * 300})
+
+            self.assertIn("'bar' was truncated", output)
+            with open(f.f.name) as out:
+                content = out.read()
+            self.assertTrue(content.startswith(self.record("a")))
+            self.assertEqual(len(content.encode()), 300)
+            self.assertIn(f"{'b' * 80}…{os.linesep}", content)
+
+    def test_outputs_have_no_default_limit(self):
+        self.assertIsNone(limits.get_limit("OUTPUT"))
+        with mock_env_with_temporary_file("GITHUB_OUTPUT"):
+            for i in range(3):
+                issue_key_value_file_command("OUTPUT", f"out{i}", "x" * 512 * 1024)
+            self.assertGreater(limits.get_usage()["OUTPUT"], 1024 * 1024)
+
+    def test_raises_if_an_empty_value_does_not_fit(self):
+        limits.set_limit("OUTPUT", 50, "spill")
+        with mock_env_with_temporary_file("GITHUB_OUTPUT") as f:
+            with self.assertRaisesRegex(Exception, "^Unable to write 'foo'"):
+                issue_key_value_file_command("OUTPUT", "foo", "")
+            f.assertFileEqual(self, "")
+
+    async def test_summary_limit(self):
+        limits.set_limit("STEP_SUMMARY", 20)
+        with mock_env_with_temporary_file(SUMMARY_ENV_VAR) as f:
+            await summary.add_raw("0123456789").write()
+            self.assertEqual(limits.get_usage()["STEP_SUMMARY"], 10)
+
+            with self.assertRaisesRegex(
+                Exception, "^Unable to write summary: GITHUB_STEP_SUMMARY"
+            ):
+                await summary.add_raw("0123456789!").write()
+            f.assertFileEqual(self, "0123456789")
+
+            await summary.clear()
+            self.assertEqual(limits.get_usage()["STEP_SUMMARY"], 0)
+
+    async def test_summary_spill_policy(self):
+        limits.set_limit("STEP_SUMMARY", 200, "spill")
+        with mock_env_with_temporary_file(SUMMARY_ENV_VAR) as f:
+            with patch("sys.stdout", io.StringIO()):
+                await summary.add_raw("x" * 500).write()
+
+            path = os.path.join(
+                self.runner_temp.name,
+                "actions-python-core",
+                f"step_summary-summary-{self.uuid}",
+            )
+            f.assertFileEqual(
+                self, f"<p>Summary too large, written to {path}</p>{os.linesep}"
+            )
+
+    async def test_summary_spill_policy_without_room_for_the_path(self):
+        limits.set_limit("STEP_SUMMARY", 50, "spill")
+        with mock_env_with_temporary_file(SUMMARY_ENV_VAR) as f:
+            output = capture_output(summary.add_raw("x" * 500).write_sync)
+
+            self.assertIn("summary does not fit in GITHUB_STEP_SUMMARY", output)
+            f.assertFileEqual(self, "")
+
+    async def test_size_aware_summary_without_room_for_the_notice(self):
+        limits.set_limit("STEP_SUMMARY", 50)
+        summary.size_aware()
+        with mock_env_with_temporary_file(SUMMARY_ENV_VAR) as f:
+            summary.add_heading("x" * 100)
+            output = capture_output(summary.write_sync)
+
+            self.assertIn("1 summary sections did not fit", output)
+            f.assertFileEqual(self, "")
+
+    async def test_size_aware_summary_collapses_pages(self):
+        summary.size_aware(page_bytes=30)
+        with mock_env_with_temporary_file(SUMMARY_ENV_VAR) as f:
+            summary.add_heading("one").add_heading("two").add_heading("three")
+            await summary.add_heading("four").write()
+            await summary.add_heading("five").write()
+
+            nl = os.linesep
+            f.assertFileEqual(
+                self,
+                f"<h1>one</h1>{nl}<h1>two</h1>{nl}"
+                f"<details><summary>Page 2</summary>{nl}{nl}"
+                f"<h1>three</h1>{nl}<h1>four</h1>{nl}</details>{nl}"
+                f"<details><summary>Page 3</summary>{nl}{nl}"
+                f"<h1>five</h1>{nl}</details>{nl}",
+            )
+
+    async def test_size_aware_summary_spills_overflow(self):
+        path = os.path.join(
+            self.runner_temp.name,
+            "actions-python-core",
+            f"step_summary-summary-{self.uuid}",
+        )
+        notice = f"2 summary sections did not fit and were written to {path}"
+        headings = [f"<h1>{i}{'x' * 40}</h1>{os.linesep}" for i in range(5)]
+        # Room for three headings and the notice.
+        limit = len("".join(headings[:3])) + len(f"<p>{notice}</p>{os.linesep}")
+        limits.set_limit("STEP_SUMMARY", limit)
+        summary.size_aware()
+        with mock_env_with_temporary_file(SUMMARY_ENV_VAR) as f:
+            for i in range(5):
+                summary.add_heading(f"{i}{'x' * 40}")
+            output = capture_output(summary.write_sync)
+
+            self.assertEqual(output, f"::notice::{notice}")
+            f.assertFileEqual(
+                self, "".join(headings[:3]) + f"<p>{notice}</p>{os.linesep}"
+            )
+            with open(path) as spilled:
+                self.assertEqual(spilled.read(), "".join(headings[3:]))
+            self.assertEqual(limits.get_usage()["STEP_SUMMARY"], limit)
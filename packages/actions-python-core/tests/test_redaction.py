@@ -0,0 +1,90 @@
+import random
+import unittest
+
+from actions.core.redaction import PREFILTER_MIN_SECRETS, Redactor
+
+
+class TestRedaction(unittest.TestCase):
+    def setUp(self):
+        self.redactor = Redactor()
+
+    def test_returns_text_unchanged_without_secrets(self):
+        text = "nothing to hide"
+        self.assertFalse(self.redactor)
+        self.assertIs(self.redactor.redact(text), text)
+
+    def test_redacts_every_occurrence(self):
+        self.redactor.add("hunter2")
+        self.assertEqual(
+            self.redactor.redact("hunter2 and hunter2hunter2"), "*** and ******"
+        )
+
+    def test_prefers_longest_secret(self):
+        for secret in ("abc", "abcdef", "abcd", "bcd", "xy"):
+            self.redactor.add(secret)
+        self.assertEqual(
+            self.redactor.redact("abcdefg abcde abx bcdxy"), "***g ***e abx ******"
+        )
+
+    def test_escapes_regex_characters(self):
+        self.redactor.add("a.b*c(d)")
+        self.assertEqual(self.redactor.redact("a.b*c(d) axb*c(d)"), "*** axb*c(d)")
+
+    def test_redacts_each_line_of_multiline_secret(self):
+        self.redactor.add("first\nsecond\r\n")
+        self.assertEqual(
+            self.redactor.redact("first\nsecond\r\n and second"), "*** and ***"
+        )
+
+    def test_redacts_head_of_incomplete_text(self):
+        self.redactor.add("hunter2")
+        self.redactor.add("abcdef")
+        # The last 6 characters may hold the start of a secret.
+        self.assertEqual(
+            self.redactor.redact_head("hunter2 xyz abcdef 12abc"),
+            ("*** xyz ***", " 12abc"),
+        )
+        self.assertEqual(
+            self.redactor.redact_head("hunter2 xyz 0123456789"),
+            ("*** xyz 0123", "456789"),
+        )
+        # A secret that starts in the head is redacted as a whole.
+        self.assertEqual(self.redactor.redact_head("xxhunter2"), ("xx***", ""))
+
+    def test_ignores_empty_secret(self):
+        self.redactor.add("")
+        self.assertEqual(len(self.redactor), 0)
+
+    def test_recompiles_after_add_and_clear(self):
+        self.redactor.add("one")
+        self.assertEqual(self.redactor.redact("one two"), "*** two")
+        self.redactor.add("two")
+        self.assertEqual(self.redactor.redact("one two"), "*** ***")
+        self.redactor.clear()
+        self.assertEqual(self.redactor.redact("one two"), "one two")
+
+    def test_many_secrets(self):
+        secrets = [f"token-{i:05d}-{i * 7919 % 10007}" for i in range(5000)]
+        for secret in secrets:
+            self.redactor.add(secret)
+        text = " ".join(secrets[::-97])
+        self.assertEqual(
+            self.redactor.redact(f"<{text}>"),
+            "<" + " ".join(["***"] * len(secrets[::-97])) + ">",
+        )
+
+    def test_prefilter_matches_like_the_pattern(self):
+        rng = random.Random(0)
+        secrets = {"ab", "abcab", "bca", "cabca", "aabb"}
+        while len(secrets) <= PREFILTER_MIN_SECRETS:
+            secrets.add("".join(rng.choices("abc", k=rng.randint(2, 9))))
+        for secret in secrets:
+            self.redactor.add(secret)
+        pattern = self.redactor._compile().pattern
+        self.assertIsNotNone(self.redactor._compile().grams)
+        for _ in range(200):
+            text = "".join(rng.choices("abcd", k=rng.randint(0, 60)))
+            self.assertEqual(self.redactor.redact(text), pattern.sub("***", text), text)
+            head, rest = self.redactor.redact_head(text)
+            self.assertTrue(text.endswith(rest))
+            self.assertEqual(head, pattern.sub("***", text[: len(text) - len(rest)]))
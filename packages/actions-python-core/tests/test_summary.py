@@ -1,12 +1,19 @@
+import asyncio
+import concurrent.futures
+import csv
+import io
 import os
 import typing
 import unittest
+from unittest.mock import patch
 
 import aiofiles
 import aiofiles.os
 import aiofiles.tempfile
 
-from actions.core.summary import SUMMARY_ENV_VAR, summary
+from actions.core.redaction import redactor
+from actions.core.summary import SUMMARY_ENV_VAR, TABLE_CHUNK_ROWS, Raw, summary
+from actions.core.summary_renderers import HtmlRenderer
 
 
 class TestSummary(unittest.IsolatedAsyncioTestCase):
@@ -55,6 +62,9 @@ class TestSummary(unittest.IsolatedAsyncioTestCase):
         if SUMMARY_ENV_VAR in os.environ:
             del os.environ[SUMMARY_ENV_VAR]
         summary.empty_buffer()
+        summary.auto_flush(None)
+        summary.set_renderer(HtmlRenderer())
+        summary._pending_sections = []
         summary._file_path = None
 
     async def test_file_path(self):
@@ -102,6 +112,28 @@ class TestSummary(unittest.IsolatedAsyncioTestCase):
         await summary.add_raw(self.text).add_raw(self.text).add_raw(self.text).write()
         await self.assertSummary("".join([self.text, self.text, self.text]))
 
+    async def test_write_sync(self):
+        await self.write_file("# ")
+        summary.add_raw(self.text).write_sync()
+        await self.assertSummary(f"# {self.text}")
+        self.assertTrue(summary.is_empty_buffer())
+
+        summary.add_raw(self.text).write_sync(overwrite=True)
+        await self.assertSummary(self.text)
+
+    async def test_clear_sync(self):
+        await self.write_file("content")
+        summary.add_raw(self.text).clear_sync()
+        await self.assertSummary("")
+        self.assertTrue(summary.is_empty_buffer())
+
+    async def test_write_sync_raises_if_summary_env_var_is_not_set(self):
+        del os.environ[SUMMARY_ENV_VAR]
+        with self.assertRaisesRegex(
+            Exception, f"^Unable to find environment variable for {SUMMARY_ENV_VAR}"
+        ):
+            summary.add_raw(self.text).write_sync()
+
     async def test_empties_buffer_after_write(self):
         await summary.add_raw(self.text).write()
         await self.assertSummary(self.text)
@@ -111,6 +143,27 @@ class TestSummary(unittest.IsolatedAsyncioTestCase):
         summary.add_raw(self.text)
         self.assertEqual(summary.stringify(), self.text)
 
+    async def test_caches_stringified_buffer(self):
+        summary.add_raw(self.text).add_raw(self.text)
+        stringified = summary.stringify()
+        self.assertEqual(stringified, self.text * 2)
+        self.assertIs(summary.stringify(), stringified)
+
+        summary.add_raw("!")
+        self.assertEqual(summary.stringify(), f"{self.text * 2}!")
+
+    async def test_auto_flushes_buffer_past_threshold(self):
+        summary.auto_flush(10)
+        summary.add_raw("12345")
+        await self.assertSummary("")
+
+        summary.add_raw("67890").add_raw("abc")
+        await self.assertSummary("1234567890")
+        self.assertEqual(summary.stringify(), "abc")
+
+        await summary.write()
+        await self.assertSummary("1234567890abc")
+
     async def test_return_correct_values_for_is_empty_buffer(self):
         summary.add_raw(self.text)
         self.assertFalse(summary.is_empty_buffer())
@@ -159,6 +212,131 @@ class TestSummary(unittest.IsolatedAsyncioTestCase):
             )
         )
 
+    async def test_adds_a_table_from_a_generator(self):
+        rows = ([f"row {i}", i] for i in range(3))
+        await summary.add_table(rows).write()
+        await self.assertSummary(
+            "<table><tr><td>row 0</td><td>0</td></tr><tr><td>row 1</td><td>1</td>"
+            f"</tr><tr><td>row 2</td><td>2</td></tr></table>{os.linesep}"
+        )
+
+    async def test_adds_an_empty_table(self):
+        await summary.add_table(iter([])).write()
+        await self.assertSummary(f"<table>{os.linesep}")
+
+    async def test_adds_a_table_with_omitted_rows(self):
+        rows = ([f"row {i}", str(i)] for i in range(10))
+        await summary.add_table(rows, max_rows=2).write()
+        await self.assertSummary(
+            "<table><tr><td>row 0</td><td>0</td></tr><tr><td>row 1</td><td>1</td>"
+            '</tr><tr><td colspan="2"><em>8 rows omitted</em></td></tr></table>'
+            f"{os.linesep}"
+        )
+
+    async def test_adds_a_table_from_csv(self):
+        content = "name,result\ntest_a,passed\ntest_b,\n"
+        await summary.add_table(csv.reader(io.StringIO(content))).write()
+        await self.assertSummary(
+            "<table><tr><td>name</td><td>result</td></tr><tr><td>test_a</td>"
+            f"<td>passed</td></tr><tr><td>test_b</td><td></tr></table>{os.linesep}"
+        )
+
+        await summary.empty_buffer().clear()
+        reader = csv.DictReader(io.StringIO(content))
+        await summary.add_table(reader, max_rows=1).write()
+        await self.assertSummary(
+            "<table><tr><th>name</th><th>result</th></tr><tr><td>test_a</td>"
+            '<td>passed</td></tr><tr><td colspan="2"><em>1 row omitted</em></td>'
+            f"</tr></table>{os.linesep}"
+        )
+
+    async def test_adds_a_table_from_columnar_sources(self):
+        class Column:
+            def __init__(self, values):
+                self.values = values
+
+            def to_pylist(self):
+                return self.values
+
+        class RecordBatch:
+            column_names: typing.ClassVar = ["name", "duration"]
+            columns: typing.ClassVar = [
+                Column(["test_a", "test_b"]),
+                Column([1.5, None]),
+            ]
+
+        class Table(RecordBatch):
+            def to_batches(self, max_chunksize):
+                return [RecordBatch(), RecordBatch()]
+
+        class Array:
+            class dtype:  # noqa: N801
+                names = ("name", "duration")
+
+            def __init__(self, rows):
+                self.rows = rows
+
+            def __len__(self):
+                return len(self.rows)
+
+            def __getitem__(self, key):
+                return Array(self.rows[key])
+
+            def tolist(self):
+                return self.rows
+
+        header = "<tr><th>name</th><th>duration</th></tr>"
+        rows = "<tr><td>test_a</td><td>1.5</td></tr><tr><td>test_b</td><td></tr>"
+        for source, body in (
+            (RecordBatch(), header + rows),
+            (Table(), header + rows + rows),
+            (Array([("test_a", 1.5), ("test_b", None)]), header + rows),
+        ):
+            summary.add_table(source)
+            self.assertEqual(summary.stringify(), f"<table>{body}</table>{os.linesep}")
+            summary.empty_buffer()
+
+    async def test_adds_a_large_table_in_chunks(self):
+        summary.auto_flush(1)
+        rows = ([str(i)] for i in range(TABLE_CHUNK_ROWS * 2 + 1))
+        with patch.object(summary, "write_sync", wraps=summary.write_sync) as write:
+            summary.add_table(rows)
+        self.assertEqual(write.call_count, 3)
+
+        with open(self.file) as f:
+            content = f.read()
+        self.assertTrue(content.startswith("<table><tr><td>0</td></tr>"))
+        self.assertTrue(content.endswith(f"<tr><td>2000</td></tr></table>{os.linesep}"))
+
+    async def test_adds_a_table_with_a_row_template(self):
+        template = summary.compile_row([{"header": True}, None, {"colspan": "2"}])
+        rows = [["a", 1, "<x>"], ["{b}", None, "c & d"]]
+        await summary.add_table(
+            [["name", "count", "note"], *rows], template=template
+        ).write()
+        await self.assertSummary(
+            "<table><tr><td>name</td><td>count</td><td>note</td></tr>"
+            '<tr><th>a</th><td>1</td><td colspan="2">&lt;x&gt;</td></tr>'
+            '<tr><th>{b}</th><td></td><td colspan="2">c &amp; d</td></tr>'
+            f"</table>{os.linesep}"
+        )
+
+    async def test_raises_if_a_row_does_not_match_the_template(self):
+        template = summary.compile_row([None, None])
+        with self.assertRaisesRegex(Exception, "^Every row must have 2 cells$"):
+            template.render([["a", "b"], ["c"]])
+
+    async def test_adds_a_large_table_with_a_row_template(self):
+        template = summary.compile_row([None])
+        rows = ([str(i)] for i in range(TABLE_CHUNK_ROWS * 2 + 1))
+        summary.add_table(rows, template=template)
+        self.assertEqual(
+            summary.stringify(),
+            "<table>"
+            + "".join(f"<tr><td>{i}</td></tr>" for i in range(TABLE_CHUNK_ROWS * 2 + 1))
+            + f"</table>{os.linesep}",
+        )
+
     async def test_adds_a_details_element(self):
         await summary.add_details(
             self.details["label"], self.details["content"]
@@ -236,6 +414,166 @@ class TestSummary(unittest.IsolatedAsyncioTestCase):
             f'<a href="https://github.com/">GitHub</a>{os.linesep}'
         )
 
+    async def test_escapes_text_and_attributes(self):
+        summary.add_table([["<b>", "a & b"], [{"data": "'x'", "colspan": '2">'}]])
+        summary.add_link("<i>", 'https://example.com/?a=1&b="2"')
+        await summary.add_code_block("if a < b:", "py").write()
+        await self.assertSummary(
+            "<table><tr><td>&lt;b&gt;</td><td>a &amp; b</td></tr>"
+            '<tr><td colspan="2&quot;&gt;">&#x27;x&#x27;</td></tr></table>'
+            f"{os.linesep}"
+            '<a href="https://example.com/?a=1&amp;b=&quot;2&quot;">&lt;i&gt;</a>'
+            f"{os.linesep}"
+            f'<pre lang="py"><code>if a &lt; b:</code></pre>{os.linesep}'
+        )
+
+    async def test_adds_raw_values_as_is(self):
+        summary.add_details("<b>Logs</b>", Raw("<pre>log</pre>"))
+        await summary.add_list([Raw("<b>bold</b>"), "<i>"]).write()
+        await self.assertSummary(
+            "<details><summary>&lt;b&gt;Logs&lt;/b&gt;</summary><pre>log</pre>"
+            f"</details>{os.linesep}<ul><li><b>bold</b></li><li>&lt;i&gt;</li></ul>"
+            f"{os.linesep}"
+        )
+
+    async def test_does_not_escape_if_disabled(self):
+        summary.set_renderer(HtmlRenderer(escape=False))
+        await summary.add_heading("<i>heading</i>").write()
+        await self.assertSummary(f"<h1><i>heading</i></h1>{os.linesep}")
+
+    async def test_adds_sections_in_start_order(self):
+        first, second, third = summary.section(), summary.section(), summary.section()
+        third.add_heading("third").commit()
+        second.add_heading("second").commit()
+        self.assertTrue(summary.is_empty_buffer())
+
+        first.add_heading("first").commit()
+        self.assertEqual(summary.buffer_bytes(), len(summary.stringify().encode()))
+        await summary.write()
+        await self.assertSummary(
+            f"<h1>first</h1>{os.linesep}<h1>second</h1>{os.linesep}"
+            f"<h1>third</h1>{os.linesep}"
+        )
+
+    async def test_warns_about_sections_held_behind_an_open_one(self):
+        first, second, third = summary.section(), summary.section(), summary.section()
+        second.add_heading("second").commit()
+        third.add_heading("third").commit()
+        with patch("actions.core.summary.issue_command") as issue_command:
+            await summary.add_heading("heading").write()
+            issue_command.assert_called_once_with(
+                "warning",
+                {},
+                "2 committed summary sections are not written, they wait for a "
+                "section started before them that is still open",
+            )
+        await self.assertSummary(f"<h1>heading</h1>{os.linesep}")
+
+        first.discard()
+        with patch("actions.core.summary.issue_command") as issue_command:
+            await summary.write()
+            issue_command.assert_not_called()
+        await self.assertSummary(
+            f"<h1>heading</h1>{os.linesep}<h1>second</h1>{os.linesep}"
+            f"<h1>third</h1>{os.linesep}"
+        )
+
+    async def test_discards_sections(self):
+        first, second = summary.section(), summary.section()
+        second.add_heading("second").commit()
+        with self.assertRaisesRegex(ValueError, "^failed$"):
+            with first:
+                first.add_heading("first")
+                raise ValueError("failed")
+        self.assertEqual(first.state, "discarded")
+
+        with summary.section() as third:
+            third.add_heading("third")
+        await summary.write()
+        await self.assertSummary(
+            f"<h1>second</h1>{os.linesep}<h1>third</h1>{os.linesep}"
+        )
+
+    async def test_raises_if_a_section_is_written_or_committed_twice(self):
+        section = summary.section()
+        with self.assertRaisesRegex(
+            RuntimeError, r"^Summary sections are not written, use commit\(\)"
+        ):
+            await section.add_heading("heading").write()
+        section.commit()
+        with self.assertRaisesRegex(Exception, "^Summary section already committed$"):
+            section.discard()
+
+    async def test_raises_if_a_section_is_flushed(self):
+        section = summary.section()
+        with self.assertRaisesRegex(
+            RuntimeError, r"^Summary sections are not flushed, use commit\(\)"
+        ):
+            section.auto_flush(10)
+        with self.assertRaisesRegex(RuntimeError, "^Summary sections are not written"):
+            section.clear_sync()
+
+        # Without auto flush, sections hold any amount of content.
+        section.auto_flush(None).add_raw("x" * 100).commit()
+        await summary.write()
+        await self.assertSummary("x" * 100)
+
+    async def test_adds_sections_of_concurrent_tasks(self):
+        async def report(section, name):
+            section.add_heading(name)
+            for i in range(3):
+                await asyncio.sleep(0)
+                section.add_list([f"{name} {i}"])
+            section.commit()
+
+        sections = [summary.section() for _ in range(10)]
+        await asyncio.gather(
+            *[
+                report(section, f"task {i}")
+                for i, section in reversed(list(enumerate(sections)))
+            ]
+        )
+        await summary.write()
+
+        expected = "".join(
+            f"<h1>task {i}</h1>{os.linesep}"
+            + "".join(f"<ul><li>task {i} {j}</li></ul>{os.linesep}" for j in range(3))
+            for i in range(10)
+        )
+        await self.assertSummary(expected)
+
+    async def test_adds_sections_of_concurrent_threads(self):
+        def report(section, name):
+            with section:
+                for i in range(100):
+                    section.add_raw(f"{name} {i}", add_eol=True)
+
+        sections = [summary.section() for _ in range(8)]
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            for i, section in enumerate(sections):
+                executor.submit(report, section, f"thread {i}")
+        summary.write_sync()
+
+        expected = "".join(
+            f"thread {i} {j}{os.linesep}" for i in range(8) for j in range(100)
+        )
+        await self.assertSummary(expected)
+
+    async def test_counts_bytes(self):
+        summary.add_raw(self.text)
+        self.assertEqual(summary.buffer_bytes(), len(self.text.encode()))
+        await summary.write()
+        self.assertEqual(summary.buffer_bytes(), 0)
+        self.assertEqual(summary.file_bytes(), len(self.text.encode()))
+
+    async def test_masks_secrets(self):
+        redactor.add("hunter2")
+        try:
+            await summary.add_raw("password: hunter2").write()
+        finally:
+            redactor.clear()
+        await self.assertSummary("password: ***")
+
     async def assertSummary(self, expr: str, msg: typing.Optional[str] = None):  # noqa: N802
         """Check that the expression is same with summary file content."""
         async with aiofiles.open(self.file, "r") as f:
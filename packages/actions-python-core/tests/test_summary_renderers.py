@@ -0,0 +1,171 @@
+import os
+import unittest
+
+from actions.core.summary import Summary
+from actions.core.summary_renderers import (
+    HtmlRenderer,
+    MarkdownRenderer,
+    MinifiedHtmlRenderer,
+    Raw,
+    escape_all,
+)
+
+NL = os.linesep
+
+TABLE = [
+    [{"data": "name", "header": True}, {"data": "result", "header": True}],
+    ["test_a", "passed"],
+    [{"data": "a | b", "colspan": "2"}],
+]
+
+
+def render(renderer: HtmlRenderer, build) -> str:
+    summary = Summary().set_renderer(renderer)
+    build(summary)
+    return summary.stringify()
+
+
+class TestEscapeAll(unittest.TestCase):
+    def test_escapes_values(self):
+        self.assertEqual(
+            escape_all(["<a>", "", "b & c", "plain"]),
+            ["&lt;a&gt;", "", "b &amp; c", "plain"],
+        )
+
+    def test_keeps_raw_values(self):
+        self.assertEqual(
+            escape_all([Raw("<a>"), "<b>", Raw("&"), '"']),
+            ["<a>", "&lt;b&gt;", "&", "&quot;"],
+        )
+
+    def test_values_with_separator(self):
+        self.assertEqual(escape_all(["a\x00<", ">"]), ["a\x00&lt;", "&gt;"])
+
+
+class TestMarkdownRenderer(unittest.TestCase):
+    def render(self, build) -> str:
+        return render(MarkdownRenderer(), build)
+
+    def test_heading(self):
+        self.assertEqual(
+            self.render(lambda s: s.add_heading("Title", 2)), f"## Title{NL}{NL}"
+        )
+        self.assertEqual(
+            self.render(lambda s: s.add_heading("Title", 9)), f"# Title{NL}{NL}"
+        )
+
+    def test_list(self):
+        self.assertEqual(
+            self.render(lambda s: s.add_list(["a", "b"])), f"- a{NL}- b{NL}{NL}"
+        )
+        self.assertEqual(
+            self.render(lambda s: s.add_list(["a", "b"], ordered=True)),
+            f"1. a{NL}2. b{NL}{NL}",
+        )
+
+    def test_table(self):
+        self.assertEqual(
+            self.render(lambda s: s.add_table(TABLE)),
+            f"|name|result|{NL}|-|-|{NL}|test_a|passed|{NL}|a \\| b||{NL}{NL}",
+        )
+
+    def test_table_with_omitted_rows(self):
+        rows = [["a", "b"]] * 4
+        self.assertEqual(
+            self.render(lambda s: s.add_table(rows, max_rows=2)),
+            f"|a|b|{NL}|-|-|{NL}|a|b|{NL}|*2 rows omitted*||{NL}{NL}",
+        )
+
+    def test_table_with_a_row_template(self):
+        def build(s):
+            template = s.compile_row([None, {"colspan": "2"}])
+            s.add_table([["name", "note", ""], ["a", "b | c"]], template=template)
+
+        self.assertEqual(
+            self.render(build),
+            f"|name|note||{NL}|-|-|-|{NL}|a|b \\| c||{NL}{NL}",
+        )
+
+    def test_link_and_image_are_escaped(self):
+        self.assertEqual(
+            self.render(
+                lambda s: s.add_link("[x](evil) \\", "https://a.io/b (c)?d=1&e=%20")
+            ),
+            f"[\\[x\\](evil) \\\\](https://a.io/b%20%28c%29?d=1&amp;e=%20){NL}",
+        )
+        self.assertEqual(
+            self.render(lambda s: s.add_image("a (1).png", "a]b")),
+            f"![a\\]b](a%20%281%29.png){NL}{NL}",
+        )
+        self.assertEqual(
+            self.render(lambda s: s.add_link(Raw("*[x]*"), Raw("a (b)"))),
+            f"[*[x]*](a (b)){NL}",
+        )
+
+    def test_code_block(self):
+        self.assertEqual(
+            self.render(lambda s: s.add_code_block("print('```')", "python")),
+            f"````python{NL}print('```'){NL}````{NL}{NL}",
+        )
+
+    def test_quote_link_image_and_separator(self):
+        self.assertEqual(
+            self.render(lambda s: s.add_quote("line 1\nline 2")),
+            f"> line 1{NL}> line 2{NL}{NL}",
+        )
+        self.assertEqual(
+            self.render(lambda s: s.add_link("GitHub", "https://github.com/")),
+            f"[GitHub](https://github.com/){NL}",
+        )
+        self.assertEqual(
+            self.render(lambda s: s.add_image("logo.png", "logo")),
+            f"![logo](logo.png){NL}{NL}",
+        )
+        self.assertEqual(
+            self.render(lambda s: s.add_image("logo.png", "logo", width="32")),
+            f'<img src="logo.png" alt="logo" width="32">{NL}',
+        )
+        self.assertEqual(self.render(lambda s: s.add_separator()), f"---{NL}{NL}")
+
+    def test_escapes_text_but_not_code(self):
+        self.assertEqual(
+            self.render(lambda s: s.add_table([["<a>"], ["b & c"]])),
+            f"|&lt;a&gt;|{NL}|-|{NL}|b &amp; c|{NL}{NL}",
+        )
+        self.assertEqual(
+            self.render(lambda s: s.add_code_block("a < b")),
+            f"```{NL}a < b{NL}```{NL}{NL}",
+        )
+
+    def test_details_stay_html(self):
+        self.assertEqual(
+            self.render(lambda s: s.add_details("open me", "content")),
+            f"<details><summary>open me</summary>content</details>{NL}",
+        )
+
+
+class TestMinifiedHtmlRenderer(unittest.TestCase):
+    def render(self, build) -> str:
+        return render(MinifiedHtmlRenderer(), build)
+
+    def test_omits_optional_end_tags(self):
+        self.assertEqual(
+            self.render(lambda s: s.add_table(TABLE)),
+            "<table><tr><th>name<th>result<tr><td>test_a<td>passed"
+            f'<tr><td colspan="2">a | b</table>{NL}',
+        )
+        self.assertEqual(
+            self.render(lambda s: s.add_list(["a", "b"])), f"<ul><li>a<li>b</ul>{NL}"
+        )
+
+    def test_row_template(self):
+        template = MinifiedHtmlRenderer().compile_row([{"header": True}, None])
+        self.assertEqual(
+            template.render([["a", "b"], ["c", "<d>"]]),
+            "<tr><th>a<td>b<tr><th>c<td>&lt;d&gt;",
+        )
+
+    def test_keeps_other_end_tags(self):
+        self.assertEqual(
+            self.render(lambda s: s.add_heading("Title")), f"<h1>Title</h1>{NL}"
+        )
@@ -0,0 +1,198 @@
+import concurrent.futures
+import io
+import os
+import time
+import typing
+import unittest
+from unittest.mock import patch
+
+from actions.core.core import end_group, info, set_output, start_group, warning
+from actions.core.writer import (
+    BufferedWriter,
+    StreamWriter,
+    buffered_output,
+    get_writer,
+    set_writer,
+)
+
+
+class CountingStringIO(io.StringIO):
+    writes: int
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def write(self, s: str) -> int:
+        self.writes += 1
+        return super().write(s)
+
+
+class TestWriter(unittest.TestCase):
+    def setUp(self):
+        self.stream = CountingStringIO()
+
+    def tearDown(self):
+        set_writer(StreamWriter())
+
+    def test_stream_writer_writes_through(self):
+        set_writer(StreamWriter(self.stream))
+        info("foo")
+        warning("bar")
+        self.assertEqual(
+            self.stream.getvalue(), f"foo{os.linesep}::warning::bar{os.linesep}"
+        )
+        self.assertEqual(self.stream.writes, 2)
+
+    def test_buffered_writer_holds_lines_until_flush(self):
+        writer = BufferedWriter(self.stream, flush_interval=60)
+        set_writer(writer)
+        for i in range(100):
+            info(f"line {i}")
+        self.assertEqual(self.stream.getvalue(), "")
+
+        writer.flush()
+        self.assertEqual(
+            self.stream.getvalue(),
+            "".join(f"line {i}{os.linesep}" for i in range(100)),
+        )
+        self.assertEqual(self.stream.writes, 1)
+
+    def test_buffered_writer_flushes_on_size_without_splitting_lines(self):
+        set_writer(BufferedWriter(self.stream, max_size=25, flush_interval=60))
+        for i in range(10):
+            warning(f"message {i}")
+        lines = self.stream.getvalue().split(os.linesep)
+        self.assertEqual(lines[-1], "")
+        for line in lines[:-1]:
+            self.assertRegex(line, r"^::warning::message \d$")
+        self.assertGreater(self.stream.writes, 1)
+        self.assertLess(self.stream.writes, 10)
+
+    def test_buffered_writer_flushes_on_interval(self):
+        set_writer(BufferedWriter(self.stream, flush_interval=5))
+        with patch("time.monotonic", return_value=1e9):
+            info("late")
+        self.assertEqual(self.stream.getvalue(), f"late{os.linesep}")
+
+    def test_end_group_flushes_buffered_writer(self):
+        set_writer(BufferedWriter(self.stream, flush_interval=60))
+        start_group("my-group")
+        info("in my group")
+        end_group()
+        self.assertEqual(
+            self.stream.getvalue(),
+            f"::group::my-group{os.linesep}in my group{os.linesep}"
+            f"::endgroup::{os.linesep}",
+        )
+        self.assertEqual(self.stream.writes, 2)
+
+    def test_end_group_keeps_lines_of_other_threads_in_the_group(self):
+        set_writer(BufferedWriter(self.stream, flush_interval=60))
+        info("before")
+        start_group("g")
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            executor.submit(info, "worker line inside group").result()
+        end_group()
+        self.assertEqual(
+            self.stream.getvalue(),
+            f"before{os.linesep}::group::g{os.linesep}"
+            f"worker line inside group{os.linesep}::endgroup::{os.linesep}",
+        )
+
+    def test_buffered_writer_flushes_on_interval_without_more_writes(self):
+        set_writer(BufferedWriter(self.stream, flush_interval=0.05))
+        info("hello")
+        self.assertEqual(self.stream.getvalue(), "")
+        for _ in range(100):
+            if self.stream.getvalue():
+                break
+            time.sleep(0.02)
+        self.assertEqual(self.stream.getvalue(), f"hello{os.linesep}")
+
+    def test_write_bytes_goes_to_binary_buffer_in_order(self):
+        raw = io.BytesIO()
+        stream = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        set_writer(BufferedWriter(stream, flush_interval=60))
+        info("before")
+        get_writer().write_bytes(memoryview(b"raw \xf0\x9f\x8c\x8e chunk"))
+        info("")
+        get_writer().flush()
+        self.assertEqual(
+            raw.getvalue(),
+            f"before{os.linesep}raw 🌎 chunk{os.linesep}".encode(),
+        )
+
+    def test_write_bytes_decodes_for_text_only_streams(self):
+        set_writer(StreamWriter(self.stream))
+        get_writer().write_bytes(b"raw \xf0\x9f\x8c\x8e chunk")
+        self.assertEqual(self.stream.getvalue(), "raw 🌎 chunk")
+
+    def test_set_writer_flushes_previous_writer(self):
+        set_writer(BufferedWriter(self.stream, flush_interval=60))
+        info("pending")
+        previous = set_writer(StreamWriter(self.stream))
+        self.assertIsInstance(previous, BufferedWriter)
+        self.assertEqual(self.stream.getvalue(), f"pending{os.linesep}")
+
+    def test_buffered_output_restores_previous_writer(self):
+        previous = get_writer()
+        with patch("sys.stdout", self.stream):
+            with buffered_output(flush_interval=60) as writer:
+                self.assertIs(get_writer(), writer)
+                info("foo")
+                info("bar")
+                self.assertEqual(self.stream.getvalue(), "")
+        self.assertIs(get_writer(), previous)
+        self.assertEqual(self.stream.getvalue(), f"foo{os.linesep}bar{os.linesep}")
+
+
+class TestWriterThreadSafety(unittest.TestCase):
+    threads: typing.ClassVar[int] = 16
+    lines_per_thread: typing.ClassVar[int] = 1500
+
+    def tearDown(self):
+        set_writer(StreamWriter())
+
+    def emit(self, thread: int) -> None:
+        for i in range(self.lines_per_thread):
+            if i % 3 == 0:
+                info(f"info {thread} {i}")
+            elif i % 3 == 1:
+                warning(f"warning {thread} {i}\nsecond line")
+            else:
+                set_output(f"out {thread}", i)
+
+    def assert_lines_intact(self, output: str) -> None:
+        lines = output.split(os.linesep)
+        self.assertEqual(lines.pop(), "")
+        pattern = (
+            r"^(info \d+ \d+|::warning::warning \d+ \d+%0Asecond line|"
+            r"|::set-output name=out \d+::\d+)$"
+        )
+        last_seen: typing.Dict[str, int] = {}
+        for line in lines:
+            self.assertRegex(line, pattern)
+            if line.startswith("info"):
+                _, thread, i = line.split(" ")
+                self.assertGreater(int(i), last_seen.get(thread, -1))
+                last_seen[thread] = int(i)
+        self.assertEqual(len(lines), self.threads * self.lines_per_thread * 4 // 3)
+
+    def run_threads(self, writer: StreamWriter) -> None:
+        set_writer(writer)
+        with concurrent.futures.ThreadPoolExecutor(self.threads) as executor:
+            list(executor.map(self.emit, range(self.threads)))
+        writer.flush()
+
+    def test_stream_writer_keeps_lines_intact(self):
+        stream = io.StringIO()
+        with patch.dict("os.environ", {"GITHUB_OUTPUT": ""}):
+            self.run_threads(StreamWriter(stream))
+        self.assert_lines_intact(stream.getvalue())
+
+    def test_buffered_writer_keeps_lines_intact(self):
+        stream = io.StringIO()
+        with patch.dict("os.environ", {"GITHUB_OUTPUT": ""}):
+            self.run_threads(BufferedWriter(stream, max_size=4096, flush_interval=0.01))
+        self.assert_lines_intact(stream.getvalue())
@@ -6,6 +6,8 @@ import tempfile
 import typing
 import unittest
 
+from actions.core.file_command import close_file_commands
+
 if sys.version_info < (3, 10):
     import typing_extensions
 
@@ -53,6 +55,7 @@ def mock_env_with_temporary_file(name: str):
     with tempfile.NamedTemporaryFile("w", delete=False) as f:
         os.environ[name] = f.name
         yield TemporaryFileAssert(f)
+        close_file_commands()
         if os.path.isfile(f.name):
             os.remove(f.name)
         if name in os.environ: